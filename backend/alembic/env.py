@@ -9,7 +9,7 @@ from alembic import context
 
 # Import your models here
 from app.database import Base
-from app.models import User, Game
+from app.models import User, Game, UserGameStats, UserOpeningStats
 from app.config import settings
 
 # this is the Alembic Config object
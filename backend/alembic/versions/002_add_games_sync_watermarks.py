@@ -0,0 +1,26 @@
+"""Add games sync watermarks to users
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('games_sync_watermarks', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'games_sync_watermarks')
@@ -0,0 +1,57 @@
+"""Add user_game_stats rollup table
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_game_stats',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('perf_type', sa.String(), nullable=False),
+        sa.Column('user_color', sa.String(), nullable=False),
+        sa.Column('games', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('wins', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('losses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('draws', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('min_rating', sa.Integer(), nullable=True),
+        sa.Column('max_rating', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'perf_type', 'user_color'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    )
+
+    # Backfill from existing games
+    op.execute("""
+        INSERT INTO user_game_stats
+            (user_id, perf_type, user_color, games, wins, losses, draws, min_rating, max_rating)
+        SELECT
+            user_id,
+            perf_type,
+            user_color,
+            count(*),
+            count(*) FILTER (WHERE result = 'WIN'),
+            count(*) FILTER (WHERE result = 'LOSS'),
+            count(*) FILTER (WHERE result = 'DRAW'),
+            min(CASE WHEN user_color = 'white' THEN white_rating ELSE black_rating END),
+            max(CASE WHEN user_color = 'white' THEN white_rating ELSE black_rating END)
+        FROM games
+        GROUP BY user_id, perf_type, user_color
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_game_stats')
@@ -0,0 +1,63 @@
+"""Add composite indexes for games list queries
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build without blocking ingest on large tables
+    with op.get_context().autocommit_block():
+        # Default list order, keyset pagination and since/until windows
+        op.create_index(
+            'ix_games_user_created',
+            'games',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # perf_type filter
+        op.create_index(
+            'ix_games_user_perf_created',
+            'games',
+            ['user_id', 'perf_type', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # result filter
+        op.create_index(
+            'ix_games_user_result_created',
+            'games',
+            ['user_id', 'result', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # rated=true filter (the common case for rated/casual)
+        op.create_index(
+            'ix_games_user_rated_created',
+            'games',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_where=sa.text('rated'),
+            postgresql_concurrently=True,
+        )
+        # Covered by the leading column of ix_games_user_created
+        op.drop_index('ix_games_user_id', 'games', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_games_user_id', 'games', ['user_id'], postgresql_concurrently=True)
+        op.drop_index('ix_games_user_rated_created', 'games', postgresql_concurrently=True)
+        op.drop_index('ix_games_user_result_created', 'games', postgresql_concurrently=True)
+        op.drop_index('ix_games_user_perf_created', 'games', postgresql_concurrently=True)
+        op.drop_index('ix_games_user_created', 'games', postgresql_concurrently=True)
@@ -0,0 +1,26 @@
+"""Add sync fencing token to users
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('sync_fence', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'sync_fence')
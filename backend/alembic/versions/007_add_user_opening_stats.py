@@ -0,0 +1,62 @@
+"""Add user_opening_stats aggregate table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_opening_stats',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('perf_type', sa.String(), nullable=False),
+        sa.Column('user_color', sa.String(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('opening_eco', sa.String(), nullable=False),
+        sa.Column('opening_name', sa.String(), nullable=False),
+        sa.Column('games', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('wins', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('losses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('draws', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint(
+            'user_id', 'perf_type', 'user_color', 'month', 'opening_eco', 'opening_name'
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    )
+
+    # Backfill from existing games
+    op.execute("""
+        INSERT INTO user_opening_stats
+            (user_id, perf_type, user_color, month, opening_eco, opening_name,
+             games, wins, losses, draws)
+        SELECT
+            user_id,
+            perf_type,
+            user_color,
+            date_trunc('month', created_at)::date,
+            coalesce(opening_eco, ''),
+            coalesce(opening_name, ''),
+            count(*),
+            count(*) FILTER (WHERE result = 'WIN'),
+            count(*) FILTER (WHERE result = 'LOSS'),
+            count(*) FILTER (WHERE result = 'DRAW')
+        FROM games
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_opening_stats')
@@ -0,0 +1,50 @@
+"""Cover rating history with the games perf_type index
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Same key as ix_games_user_perf_created plus the rating columns,
+    # so it replaces that index instead of adding a second one
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_games_user_perf_created_rating',
+            'games',
+            ['user_id', 'perf_type', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_include=[
+                'rated',
+                'user_color',
+                'white_rating',
+                'white_rating_diff',
+                'black_rating',
+                'black_rating_diff',
+            ],
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_games_user_perf_created', 'games', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_games_user_perf_created',
+            'games',
+            ['user_id', 'perf_type', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_games_user_perf_created_rating', 'games', postgresql_concurrently=True)
@@ -0,0 +1,98 @@
+"""Hash-partition games by user_id
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Fixed here rather than imported so the migration never changes
+GAMES_PARTITIONS = 16
+
+GAMES_INDEXES = [
+    ('ix_games_user_created', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    (
+        'ix_games_user_perf_created_rating',
+        ['user_id', 'perf_type', sa.text('created_at DESC'), sa.text('id DESC')],
+        {
+            'postgresql_include': [
+                'rated',
+                'user_color',
+                'white_rating',
+                'white_rating_diff',
+                'black_rating',
+                'black_rating_diff',
+            ],
+        },
+    ),
+    ('ix_games_user_result_created', ['user_id', 'result', sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    (
+        'ix_games_user_rated_created',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        {'postgresql_where': sa.text('rated')},
+    ),
+]
+
+
+def _swap_in(new_table: str) -> None:
+    """Copy games into new_table and replace games with it"""
+    # Reads go on; writes wait until the new table is in place
+    op.execute('LOCK TABLE games IN EXCLUSIVE MODE')
+    op.execute(f'INSERT INTO {new_table} SELECT * FROM games')
+    op.drop_table('games')
+    op.rename_table(new_table, 'games')
+
+
+def _create_indexes() -> None:
+    for name, columns, kwargs in GAMES_INDEXES:
+        op.create_index(name, 'games', columns, **kwargs)
+
+
+def upgrade() -> None:
+    # Partitioned tables cannot be converted in place: build a new one
+    # with the same columns and swap it in
+    op.execute('CREATE TABLE games_partitioned (LIKE games INCLUDING DEFAULTS) PARTITION BY HASH (user_id)')
+    for remainder in range(GAMES_PARTITIONS):
+        op.execute(
+            f'CREATE TABLE games_p{remainder:02d} PARTITION OF games_partitioned '
+            f'FOR VALUES WITH (MODULUS {GAMES_PARTITIONS}, REMAINDER {remainder})'
+        )
+    
+    _swap_in('games_partitioned')
+    
+    # The partition key must be part of the primary key; this also lets
+    # two users of the app each keep their copy of a game between them
+    op.create_primary_key('games_pkey', 'games', ['user_id', 'id'])
+    op.create_foreign_key(
+        'games_user_id_fkey', 'games', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    _create_indexes()
+    
+    # Autovacuum never analyzes a partitioned parent
+    op.execute('ANALYZE games')
+
+
+def downgrade() -> None:
+    # Fails if a game is stored for more than one user, which the
+    # old primary key on id alone cannot hold
+    op.execute('CREATE TABLE games_unpartitioned (LIKE games INCLUDING DEFAULTS)')
+    
+    _swap_in('games_unpartitioned')
+    
+    op.create_primary_key('games_pkey', 'games', ['id'])
+    op.create_foreign_key(
+        'games_user_id_fkey', 'games', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    _create_indexes()
@@ -0,0 +1,55 @@
+"""Add opponent columns to games
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('games', sa.Column('opponent_username', sa.String(), nullable=True))
+    op.add_column('games', sa.Column('opponent_rating', sa.Integer(), nullable=True))
+    
+    # Backfill from the side the user did not play. AI and anonymous
+    # players were stored as 'Anonymous' and get no opponent.
+    op.execute("""
+        UPDATE games SET
+            opponent_username = lower(NULLIF(
+                CASE WHEN user_color = 'white' THEN black_username ELSE white_username END,
+                'Anonymous'
+            )),
+            opponent_rating = CASE WHEN user_color = 'white' THEN black_rating ELSE white_rating END
+    """)
+    
+    # Partitioned tables cannot be indexed concurrently; this creates a
+    # matching index on every partition
+    op.create_index(
+        'ix_games_user_opponent_created',
+        'games',
+        ['user_id', 'opponent_username', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_include=[
+            'result',
+            'opponent_rating',
+            'user_color',
+            'white_rating_diff',
+            'black_rating_diff',
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_games_user_opponent_created', 'games')
+    op.drop_column('games', 'opponent_rating')
+    op.drop_column('games', 'opponent_username')
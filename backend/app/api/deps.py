@@ -6,12 +6,34 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.services.auth import AuthService
 from app.services.user import UserService
+from app.services.user_cache import UserCache
 from app.models.user import User
+from app.schemas.auth import TokenData
 
 
 security = HTTPBearer(auto_error=False)
 
 
+def _verify_token(token: str) -> Optional[TokenData]:
+    """Verify a JWT, reusing the result for recently seen tokens"""
+    token_data = UserCache.get_token(token)
+    if token_data is None:
+        token_data = AuthService.verify_token(token)
+        if token_data is not None:
+            UserCache.put_token(token, token_data)
+    return token_data
+
+
+async def _get_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """Load a user, from the cache when possible"""
+    user = await UserCache.get_user(db, user_id)
+    if user is None:
+        user = await UserService.get_user_by_id(db, user_id)
+        if user is not None:
+            UserCache.put_user(user)
+    return user
+
+
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db),
@@ -24,7 +46,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    token_data = AuthService.verify_token(credentials.credentials)
+    token_data = _verify_token(credentials.credentials)
     if token_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,7 +54,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await UserService.get_user_by_id(db, token_data.user_id)
+    user = await _get_user(db, token_data.user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -51,8 +73,8 @@ async def get_current_user_optional(
     if credentials is None:
         return None
     
-    token_data = AuthService.verify_token(credentials.credentials)
+    token_data = _verify_token(credentials.credentials)
     if token_data is None:
         return None
     
-    return await UserService.get_user_by_id(db, token_data.user_id)
+    return await _get_user(db, token_data.user_id)
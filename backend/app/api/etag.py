@@ -0,0 +1,35 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+from app.models.user import User
+
+
+# Bump when response formats change so old ETags stop matching
+ETAG_FORMAT_VERSION = 1
+
+
+def make_etag(request: Request, user: User) -> str:
+    """Strong ETag for a per-user response, derived from the user's data version"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    raw = f"{ETAG_FORMAT_VERSION}:{user.id}:{user.data_version}:{request.url.path}?{query}"
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def check_etag(request: Request, response: Response, user: User) -> Optional[Response]:
+    """
+    Handle a conditional GET before any data is loaded.
+    Returns a 304 response if the client's copy is current, otherwise sets
+    the ETag on response and returns None.
+    """
+    etag = make_etag(request, user)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return None
@@ -26,7 +26,7 @@ async def start_oauth():
     state = AuthService.generate_state()
     
     # Store verifier for later use
-    AuthService.store_pkce_verifier(state, code_verifier)
+    await AuthService.store_pkce_verifier(state, code_verifier)
     
     # Generate auth URL
     auth_url = AuthService.get_lichess_auth_url(state, code_challenge)
@@ -44,7 +44,7 @@ async def oauth_callback(
     Exchange authorization code for access token.
     """
     # Get PKCE verifier
-    code_verifier = AuthService.get_pkce_verifier(callback.state)
+    code_verifier = await AuthService.get_pkce_verifier(callback.state)
     if not code_verifier:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
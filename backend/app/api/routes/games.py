@@ -1,12 +1,20 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional
+from datetime import datetime
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.schemas.game import GameResponse, GameListResponse, GameFilters, GameResult
-from app.services.game import GameService
+from app.services.game import GameService, InvalidCursor
+from app.services.stats import StatsService, RATING_HISTORY_POINTS
+from app.services.analytics import AnalyticsService, DIMENSIONS
+from app.services.export import ExportService, EXPORT_MEDIA_TYPES
 from app.services.lichess import LichessService
+from app.services.sync_lease import SyncCoordinator, SyncConflict
 from app.api.deps import get_current_user
+from app.api.etag import check_etag
 from app.models.user import User
 
 
@@ -15,42 +23,63 @@ router = APIRouter(prefix="/games", tags=["Games"])
 
 @router.get("/me", response_model=GameListResponse)
 async def get_my_games(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces page)"),
+    include_total: bool = Query(True, description="Include the total number of matching games"),
     perf_type: Optional[str] = Query(None, description="Filter by game type (blitz, rapid, etc.)"),
     result: Optional[GameResult] = Query(None, description="Filter by result (win, loss, draw)"),
     rated: Optional[bool] = Query(None, description="Filter by rated/casual"),
+    opponent: Optional[str] = Query(None, description="Filter by opponent's username"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get current user's game history with pagination and filters.
+    Follow next_cursor for deep pages; its cost does not grow with depth.
     """
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
+    
     filters = GameFilters(
         perf_type=perf_type,
         result=result,
         rated=rated,
+        opponent=opponent,
     )
     
-    games, total = await GameService.get_user_games(
-        db,
-        user_id=current_user.id,
-        page=page,
-        page_size=page_size,
-        filters=filters,
-    )
-    
-    # Convert to response format
-    game_responses = [GameService.game_to_response(g) for g in games]
-    
-    has_more = (page * page_size) < total
+    try:
+        games, total, next_cursor = await GameService.get_user_games(
+            db,
+            user_id=current_user.id,
+            page=page,
+            page_size=page_size,
+            filters=filters,
+            cursor=cursor,
+            include_total=include_total,
+            archived_before=current_user.archived_before,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     
-    return GameListResponse(
-        games=game_responses,
-        total=total,
-        page=page,
-        page_size=page_size,
-        has_more=has_more,
+    # Serialize rows straight to JSON; the shape matches GameListResponse,
+    # which is kept as response_model for the docs only
+    return ORJSONResponse(
+        {
+            "games": [GameService.game_to_dict(g) for g in games],
+            "total": total,
+            "page": None if cursor else page,
+            "page_size": page_size,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+        },
+        headers=dict(response.headers),
     )
 
 
@@ -58,6 +87,7 @@ async def get_my_games(
 async def sync_my_games(
     max_games: int = Query(50, ge=1, le=300, description="Maximum games to fetch"),
     perf_type: Optional[str] = Query(None, description="Filter by game type"),
+    incremental: bool = Query(True, description="Only fetch games newer than the last sync"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -70,35 +100,88 @@ async def sync_my_games(
             detail="No Lichess token available. Please log in again.",
         )
     
-    # Fetch games from Lichess
+    # Stream new games from Lichess straight into the database
     lichess_service = LichessService(current_user.access_token)
     
-    try:
-        lichess_games = await lichess_service.get_user_games(
-            username=current_user.username,
+    async def _sync(fencing_token):
+        fetched, saved_count = await GameService.sync_games_from_lichess(
+            db,
+            user=current_user,
+            lichess_service=lichess_service,
             max_games=max_games,
             perf_type=perf_type,
+            incremental=incremental,
+            fencing_token=fencing_token,
+        )
+        return {
+            "fetched": fetched,
+            "saved": saved_count,
+            "synced_at": datetime.utcnow().isoformat(),
+        }
+    
+    # Joins a running sync with the same parameters, or waits for one with others
+    try:
+        outcome = await SyncCoordinator.run(
+            current_user.id,
+            _sync,
+            issue_token=lambda: GameService.issue_sync_fence(db, current_user),
+            params={"max_games": max_games, "perf_type": perf_type, "incremental": incremental},
         )
-    except Exception as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Failed to fetch games from Lichess: {str(e)}",
         )
-    
-    # Save games to database
-    saved_count = await GameService.save_games_from_lichess(
-        db,
-        user=current_user,
-        lichess_games=lichess_games,
-    )
+    except SyncConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
     
     return {
-        "message": f"Successfully synced {saved_count} new games",
-        "fetched": len(lichess_games),
-        "saved": saved_count,
+        "message": f"Successfully synced {outcome['saved']} new games",
+        "fetched": outcome["fetched"],
+        "saved": outcome["saved"],
     }
 
 
+@router.get("/me/export")
+async def export_my_games(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    perf_type: Optional[str] = Query(None, description="Filter by game type (blitz, rapid, etc.)"),
+    result: Optional[GameResult] = Query(None, description="Filter by result (win, loss, draw)"),
+    rated: Optional[bool] = Query(None, description="Filter by rated/casual"),
+    since: Optional[datetime] = Query(None, description="Games played on or after"),
+    until: Optional[datetime] = Query(None, description="Games played on or before"),
+    opponent: Optional[str] = Query(None, description="Filter by opponent's username"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download all of current user's games, newest first.
+    The body is streamed as rows are read, so memory use stays flat.
+    """
+    filters = GameFilters(
+        perf_type=perf_type,
+        result=result,
+        rated=rated,
+        since=since,
+        until=until,
+        opponent=opponent,
+    )
+    
+    if format == "csv":
+        body = ExportService.iter_csv(current_user.id, filters, current_user.archived_before)
+    else:
+        body = ExportService.iter_ndjson(current_user.id, filters, current_user.archived_before)
+    
+    filename = f"{current_user.username}-games.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/me/{game_id}", response_model=GameResponse)
 async def get_my_game(
     game_id: str,
@@ -108,18 +191,11 @@ async def get_my_game(
     """
     Get a specific game by ID.
     """
-    from sqlalchemy import select
-    from app.models.game import Game
-    
-    result = await db.execute(
-        select(Game).where(
-            Game.id == game_id,
-            Game.user_id == current_user.id,
-        )
+    game = await GameService.get_user_game(
+        db, current_user.id, game_id, archived_before=current_user.archived_before
     )
-    game = result.scalar_one_or_none()
     
-    if not game:
+    if game is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Game not found",
@@ -130,46 +206,165 @@ async def get_my_game(
 
 @router.get("/stats/me")
 async def get_my_game_stats(
+    request: Request,
+    response: Response,
+    perf_type: Optional[str] = Query(None, description="Filter by game type (blitz, rapid, etc.)"),
+    rated: Optional[bool] = Query(None, description="Filter by rated/casual"),
+    since: Optional[datetime] = Query(None, description="Games played on or after"),
+    until: Optional[datetime] = Query(None, description="Games played on or before"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Get game statistics for current user.
+    Get game statistics for current user, optionally for a subset of games.
     """
-    from sqlalchemy import select, func
-    from app.models.game import Game, GameResult as DBGameResult
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
     
-    # Get counts by result
-    stats = {}
+    filters = GameFilters(
+        perf_type=perf_type,
+        rated=rated,
+        since=since,
+        until=until,
+    )
     
-    for result in [DBGameResult.WIN, DBGameResult.LOSS, DBGameResult.DRAW]:
-        count_result = await db.execute(
-            select(func.count()).select_from(Game).where(
-                Game.user_id == current_user.id,
-                Game.result == result,
-            )
-        )
-        stats[result.value] = count_result.scalar()
+    return await GameService.get_user_stats(
+        db, current_user.id, filters, archived_before=current_user.archived_before
+    )
+
+
+@router.get("/stats/me/openings")
+async def get_my_opening_stats(
+    request: Request,
+    response: Response,
+    perf_type: Optional[str] = Query(None, description="Filter by game type (blitz, rapid, etc.)"),
+    color: Optional[str] = Query(None, pattern="^(white|black)$", description="Filter by the user's color"),
+    since: Optional[datetime] = Query(None, description="Games from this month on"),
+    until: Optional[datetime] = Query(None, description="Games up to this month"),
+    min_games: int = Query(1, ge=1, description="Minimum games per opening"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum openings to return"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get win/draw/loss by opening and color for current user.
+    Time filters are applied by whole months.
+    """
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
+    
+    openings = await StatsService.get_opening_stats(
+        db,
+        user_id=current_user.id,
+        perf_type=perf_type,
+        color=color,
+        since=since,
+        until=until,
+        min_games=min_games,
+        limit=limit,
+    )
+    
+    return {"openings": openings}
+
+
+@router.get("/stats/me/opponents")
+async def get_my_opponent_stats(
+    request: Request,
+    response: Response,
+    perf_type: Optional[str] = Query(None, description="Filter by game type (blitz, rapid, etc.)"),
+    opponent: Optional[str] = Query(None, description="Only this opponent (head-to-head)"),
+    min_games: int = Query(1, ge=1, description="Minimum games against an opponent"),
+    limit: int = Query(20, ge=1, le=200, description="Maximum opponents to return"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get current user's record against their most played opponents.
+    """
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
     
-    # Get counts by perf type
-    perf_stats_result = await db.execute(
-        select(Game.perf_type, func.count()).where(
-            Game.user_id == current_user.id
-        ).group_by(Game.perf_type)
+    opponents = await StatsService.get_opponent_stats(
+        db,
+        user_id=current_user.id,
+        perf_type=perf_type,
+        opponent=opponent,
+        min_games=min_games,
+        limit=limit,
+        archived_before=current_user.archived_before,
     )
-    perf_stats = {row[0]: row[1] for row in perf_stats_result.all()}
     
-    # Total games
-    total_result = await db.execute(
-        select(func.count()).select_from(Game).where(
-            Game.user_id == current_user.id
+    return ORJSONResponse({"opponents": opponents}, headers=dict(response.headers))
+
+
+@router.get("/stats/me/rating-history")
+async def get_my_rating_history(
+    request: Request,
+    response: Response,
+    perf_type: str = Query(..., description="Game type (blitz, rapid, etc.)"),
+    since: Optional[datetime] = Query(None, description="Games played on or after"),
+    until: Optional[datetime] = Query(None, description="Games played on or before"),
+    points: int = Query(RATING_HISTORY_POINTS, ge=3, le=2000, description="Maximum points in the series"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get current user's rating over time for one game type,
+    downsampled on the server to at most `points` points.
+    """
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
+    
+    history = await StatsService.get_rating_history(
+        db,
+        user_id=current_user.id,
+        perf_type=perf_type,
+        since=since,
+        until=until,
+        points=points,
+        archived_before=current_user.archived_before,
+    )
+    
+    return ORJSONResponse(history, headers=dict(response.headers))
+
+
+@router.get("/stats/me/breakdowns")
+async def get_my_breakdowns(
+    request: Request,
+    response: Response,
+    by: List[str] = Query(list(DIMENSIONS), description=f"Dimensions to group by: {', '.join(DIMENSIONS)}"),
+    perf_type: Optional[str] = Query(None, description="Filter by game type (blitz, rapid, etc.)"),
+    rated: Optional[bool] = Query(None, description="Filter by rated/casual"),
+    color: Optional[str] = Query(None, pattern="^(white|black)$", description="Filter by the user's color"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get win/draw/loss for current user grouped by hour of day, weekday,
+    opponent rating difference, time control, game type or color.
+    """
+    unknown = [dimension for dimension in by if dimension not in DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown dimensions: {', '.join(unknown)}",
         )
+    
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
+    
+    columns = await AnalyticsService.load(db, current_user)
+    breakdowns = AnalyticsService.breakdowns(
+        columns,
+        dimensions=by,
+        perf_type=perf_type,
+        rated=rated,
+        color=color,
     )
-    total = total_result.scalar()
     
-    return {
-        "total": total,
-        "results": stats,
-        "by_type": perf_stats,
-        "win_rate": round(stats.get("win", 0) / total * 100, 1) if total > 0 else 0,
-    }
+    return ORJSONResponse(breakdowns, headers=dict(response.headers))
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.schemas.user import UserResponse, UserRatings, UserProfile
 from app.services.user import UserService
 from app.services.lichess import LichessService
+from app.services.profile_cache import PublicProfileCache
 from app.api.deps import get_current_user
+from app.api.etag import check_etag
 from app.models.user import User
 
 
@@ -14,11 +17,17 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=UserResponse)
 async def get_my_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
 ):
     """
     Get current user's full profile including ratings.
     """
+    not_modified = check_etag(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
+    
     # Parse ratings and profile
     ratings = UserService.parse_ratings(current_user.ratings or {})
     profile = UserService.parse_profile(current_user.profile or {})
@@ -116,9 +125,14 @@ async def get_user_profile(
             profile=profile,
         )
     
-    # Fetch from Lichess API
-    lichess_service = LichessService()
-    user_data = await lichess_service.get_user_public(username)
+    # Fetch from Lichess API (cached)
+    try:
+        user_data = await PublicProfileCache.get(username)
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to fetch user from Lichess: {str(e)}",
+        )
     
     if not user_data:
         raise HTTPException(
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.config import settings
 
 celery_app = Celery(
@@ -18,5 +19,22 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
 )
 
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Create the per-process event loop, DB engine and Lichess client"""
+    from app.tasks.runtime import init_worker_runtime
+    
+    init_worker_runtime()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    """Dispose of the per-process async runtime"""
+    from app.tasks.runtime import shutdown_worker_runtime
+    
+    shutdown_worker_runtime()
+
+
 # Import tasks
 celery_app.autodiscover_tasks(["app.tasks"])
@@ -18,6 +18,8 @@ class Settings(BaseSettings):
     # Celery
     CELERY_BROKER_URL: str = "redis://redis:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/1"
+    CELERY_DB_POOL_SIZE: int = 5  # per worker process
+    CELERY_DB_MAX_OVERFLOW: int = 5
     
     # Lichess OAuth2
     LICHESS_CLIENT_ID: str = ""
@@ -27,11 +29,54 @@ class Settings(BaseSettings):
     LICHESS_TOKEN_URL: str = "https://lichess.org/api/token"
     LICHESS_API_URL: str = "https://lichess.org/api"
     
+    # OAuth PKCE verifier store: "redis" (multi-worker) or "memory"
+    PKCE_STORE_BACKEND: str = "redis"
+    PKCE_TTL_SECONDS: int = 600
+    PKCE_MEMORY_MAX_ENTRIES: int = 10_000
+    
+    # Lichess HTTP client pool
+    LICHESS_HTTP_MAX_CONNECTIONS: int = 20
+    LICHESS_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LICHESS_HTTP_KEEPALIVE_EXPIRY: float = 60.0  # seconds
+    LICHESS_HTTP2: bool = False
+    
+    # Lichess rate limiting (shared across all workers via Redis)
+    LICHESS_RATE_LIMIT_PER_SECOND: float = 4.0
+    LICHESS_RATE_LIMIT_BURST: int = 8
+    LICHESS_RATE_LIMIT_INTERACTIVE_RESERVE: int = 2  # tokens background sync leaves free
+    LICHESS_INTERACTIVE_MAX_WAIT: float = 10.0  # seconds
+    LICHESS_MAX_RETRIES: int = 3
+    LICHESS_DEFAULT_RETRY_AFTER: float = 60.0  # seconds, per Lichess API guidelines
+    
+    # Per-user single-flight game sync (seconds)
+    SYNC_LEASE_TTL: float = 300.0  # matches the Celery task time limit
+    SYNC_JOIN_TIMEOUT: float = 60.0
+    SYNC_RESULT_TTL: int = 60
+    # Incremental syncs re-read this far behind the watermark, for games
+    # that started before the last sync but finished after it
+    SYNC_WATERMARK_OVERLAP: float = 60 * 60 * 24
+    
+    # Public profile cache (seconds)
+    PUBLIC_PROFILE_FRESH_TTL: int = 300
+    PUBLIC_PROFILE_STALE_TTL: int = 60 * 60 * 24
+    PUBLIC_PROFILE_NEGATIVE_TTL: int = 60
+    
     # JWT
     JWT_SECRET_KEY: str = "jwt-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Authenticated user cache (per API worker)
+    AUTH_CACHE_TTL: float = 30.0  # seconds
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+    
+    # Cold game archive (Parquet files, needs pyarrow)
+    ARCHIVE_DIR: str = "data/archive"
+    ARCHIVE_AFTER_DAYS: int = 365
+    
+    # Columnar game analytics cache (users per API worker)
+    ANALYTICS_CACHE_MAX_USERS: int = 64
+    
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
     
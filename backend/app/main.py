@@ -1,9 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.database import init_db
+from app.services.lichess import LichessService
+from app.services.archive import ArchiveError
+from app.services.rate_limit import RateLimitExceeded
+from app.services.user_cache import UserCache
+from app.redis_client import close_redis
 from app.api.routes import auth_router, users_router, games_router
 
 
@@ -11,9 +17,13 @@ from app.api.routes import auth_router, users_router, games_router
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    LichessService.start_client()
+    UserCache.start_listener()
     yield
     # Shutdown
-    pass
+    await UserCache.stop_listener()
+    await LichessService.close_client()
+    await close_redis()
 
 
 app = FastAPI(
@@ -32,6 +42,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Lichess API is rate limiting us. Please try again shortly."},
+        headers={"Retry-After": str(max(int(exc.retry_after), 1))},
+    )
+
+
+@app.exception_handler(ArchiveError)
+async def archive_error_handler(request: Request, exc: ArchiveError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Archived games are temporarily unavailable."},
+    )
+
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
@@ -1,4 +1,5 @@
 from app.models.user import User
 from app.models.game import Game
+from app.models.stats import UserGameStats, UserOpeningStats
 
-__all__ = ["User", "Game"]
+__all__ = ["User", "Game", "UserGameStats", "UserOpeningStats"]
@@ -1,10 +1,23 @@
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import (
+    Column, String, DateTime, Integer, Boolean, ForeignKey, Index, PrimaryKeyConstraint,
+    DDL, event, Enum as SQLEnum, text,
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 import enum
 
 
+# games is hash-partitioned by user_id into this many partitions,
+# games_p00 .. games_p15. Changing it needs a migration that rebuilds
+# the table.
+GAMES_PARTITIONS = 16
+
+# Stored as the username of a side without a Lichess account (AI or
+# anonymous player)
+ANONYMOUS_USERNAME = "Anonymous"
+
+
 class GameResult(str, enum.Enum):
     WIN = "win"
     LOSS = "loss"
@@ -28,7 +41,7 @@ class Game(Base):
     __tablename__ = "games"
     
     id = Column(String, primary_key=True)  # Lichess game ID
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     
     # Game info
     rated = Column(Boolean, default=True)
@@ -48,6 +61,10 @@ class Game(Base):
     black_rating = Column(Integer, nullable=True)
     black_rating_diff = Column(Integer, nullable=True)
     
+    # Opponent, from user's perspective; username is lowercased
+    opponent_username = Column(String, nullable=True)
+    opponent_rating = Column(Integer, nullable=True)
+    
     # Result from user's perspective
     user_color = Column(String, nullable=False)  # white or black
     result = Column(SQLEnum(GameResult), nullable=False)
@@ -65,5 +82,68 @@ class Game(Base):
     # Relationships
     user = relationship("User", back_populates="games")
     
+    # Partitioned by hash of user_id: every query is per user, so each one
+    # touches a single partition. The key must be part of the primary key.
+    # Indexes match the list query's filters and its (created_at, id)
+    # DESC order, so pages are read without a sort.
+    __table_args__ = (
+        PrimaryKeyConstraint(user_id, id, name="games_pkey"),
+        Index("ix_games_user_created", user_id, created_at.desc(), id.desc()),
+        # Also covers the rating history query so it is an index-only scan
+        Index(
+            "ix_games_user_perf_created_rating",
+            user_id,
+            perf_type,
+            created_at.desc(),
+            id.desc(),
+            postgresql_include=[
+                "rated",
+                "user_color",
+                "white_rating",
+                "white_rating_diff",
+                "black_rating",
+                "black_rating_diff",
+            ],
+        ),
+        Index("ix_games_user_result_created", user_id, result, created_at.desc(), id.desc()),
+        Index(
+            "ix_games_user_rated_created",
+            user_id,
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("rated"),
+        ),
+        # Head-to-head: opponent filter and per-opponent stats
+        Index(
+            "ix_games_user_opponent_created",
+            user_id,
+            opponent_username,
+            created_at.desc(),
+            id.desc(),
+            postgresql_include=[
+                "result",
+                "opponent_rating",
+                "user_color",
+                "white_rating_diff",
+                "black_rating_diff",
+            ],
+        ),
+        {"postgresql_partition_by": "HASH (user_id)"},
+    )
+    
     def __repr__(self):
         return f"<Game {self.id} - {self.user_id}>"
+
+
+def game_partition_ddl() -> list:
+    """CREATE statements for every partition of games, safe to rerun"""
+    return [
+        f"CREATE TABLE IF NOT EXISTS games_p{remainder:02d} PARTITION OF games "
+        f"FOR VALUES WITH (MODULUS {GAMES_PARTITIONS}, REMAINDER {remainder})"
+        for remainder in range(GAMES_PARTITIONS)
+    ]
+
+
+# create_all (init_db) only creates the partitioned parent; add partitions
+for _statement in game_partition_ddl():
+    event.listen(Game.__table__, "after_create", DDL(_statement))
@@ -0,0 +1,52 @@
+from sqlalchemy import Column, String, Integer, Date, ForeignKey
+from app.database import Base
+
+
+class UserGameStats(Base):
+    """
+    Per-user game counts rolled up by perf type and color.
+    Maintained incrementally by GameService.insert_games in the same
+    transaction as the games themselves.
+    """
+    __tablename__ = "user_game_stats"
+    
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    perf_type = Column(String, primary_key=True)
+    user_color = Column(String, primary_key=True)  # white or black
+    
+    # Counts
+    games = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    draws = Column(Integer, nullable=False, default=0)
+    
+    # User's rating extremes in these games
+    min_rating = Column(Integer, nullable=True)
+    max_rating = Column(Integer, nullable=True)
+    
+    def __repr__(self):
+        return f"<UserGameStats {self.user_id} {self.perf_type} {self.user_color}>"
+
+
+class UserOpeningStats(Base):
+    """
+    Per-user results by opening, rolled up by perf type, color and month.
+    Maintained incrementally alongside UserGameStats.
+    """
+    __tablename__ = "user_opening_stats"
+    
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    perf_type = Column(String, primary_key=True)
+    user_color = Column(String, primary_key=True)  # white or black
+    month = Column(Date, primary_key=True)  # first day of the month played
+    opening_eco = Column(String, primary_key=True)  # "" if unknown
+    opening_name = Column(String, primary_key=True)  # "" if unknown
+    
+    # Counts
+    games = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    draws = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<UserOpeningStats {self.user_id} {self.opening_eco} {self.month}>"
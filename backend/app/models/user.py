@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, JSON, Boolean
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, JSON, Boolean
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -36,6 +36,20 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_games_sync = Column(DateTime, nullable=True)
     
+    # Newest Lichess createdAt (ms) ingested, per perf type
+    # Format: {"all": 1700000000000, "blitz": 1700000000000, ...}
+    games_sync_watermarks = Column(JSON, default=dict)
+    
+    # Bumped whenever the user's profile or games change; drives ETags
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Fencing token of the latest sync to start (see SyncCoordinator)
+    sync_fence = Column(BigInteger, nullable=True)
+    
+    # Games played before this were moved to the Parquet archive
+    # (see ArchiveService); the games table only holds newer ones
+    archived_before = Column(DateTime, nullable=True)
+    
     # Relationships
     games = relationship("Game", back_populates="user", cascade="all, delete-orphan")
     
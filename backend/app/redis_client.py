@@ -0,0 +1,23 @@
+from typing import Optional
+from redis.asyncio import Redis
+
+from app.config import settings
+
+
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Get the process-wide async Redis client, creating it on first use"""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the Redis client and its connection pool"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -11,6 +11,7 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     user_id: Optional[str] = None
     username: Optional[str] = None
+    exp: Optional[int] = None  # expiry as a Unix timestamp
 
 
 class OAuthCallback(BaseModel):
@@ -71,10 +71,11 @@ class GameResponse(BaseModel):
 
 class GameListResponse(BaseModel):
     games: List[GameResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None  # None when paginating by cursor
     page_size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class GameFilters(BaseModel):
@@ -83,6 +84,7 @@ class GameFilters(BaseModel):
     rated: Optional[bool] = None
     since: Optional[datetime] = None
     until: Optional[datetime] = None
+    opponent: Optional[str] = None  # opponent's username, any case
 
 
 class LichessGame(BaseModel):
@@ -2,5 +2,6 @@ from app.services.lichess import LichessService
 from app.services.auth import AuthService
 from app.services.user import UserService
 from app.services.game import GameService
+from app.services.stats import StatsService
 
-__all__ = ["LichessService", "AuthService", "UserService", "GameService"]
+__all__ = ["LichessService", "AuthService", "UserService", "GameService", "StatsService"]
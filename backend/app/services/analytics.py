@@ -0,0 +1,244 @@
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.game import Game, GameResult
+from app.models.user import User
+from app.services.archive import ArchiveService
+
+
+# Result codes; the per-group counters come out in this order
+RESULTS = (GameResult.WIN, GameResult.DRAW, GameResult.LOSS)
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+COLORS = ("white", "black")
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Opponent rating minus the user's rating, bucketed by these edges
+RATING_DELTA_EDGES = np.array([-200, -100, -50, 0, 50, 100, 200], dtype=np.int16)
+RATING_DELTA_LABELS = (
+    "<-200", "-200..-101", "-100..-51", "-50..-1",
+    "0..49", "50..99", "100..199", ">=200",
+)
+
+# Initial clocks under a minute that Lichess writes as fractions
+CLOCK_FRACTIONS = {15: "¼", 30: "½", 45: "¾"}
+
+# Game columns loaded into GameColumns, in from_rows order
+LOADED_COLUMNS = (
+    "created_at",
+    "perf_type",
+    "result",
+    "user_color",
+    "rated",
+    "white_rating",
+    "black_rating",
+    "time_control_initial",
+    "time_control_increment",
+)
+
+DIMENSIONS = ("hour", "weekday", "rating_delta", "time_control", "perf_type", "color")
+
+
+class GameColumns:
+    """
+    A user's games as parallel NumPy arrays, one entry per game.
+    Strings are stored as small integer codes into a label tuple.
+    """
+    
+    __slots__ = (
+        "size",
+        "hour",
+        "weekday",
+        "result",
+        "color",
+        "rated",
+        "rating_delta",
+        "rating_delta_valid",
+        "perf_type",
+        "perf_type_labels",
+        "time_control",
+        "time_control_labels",
+    )
+    
+    @staticmethod
+    def time_control_label(initial: Optional[int], increment: Optional[int]) -> str:
+        """Time control as Lichess writes it: "3+2", "½+0", "1.5+0", ..."""
+        if initial is None or increment is None:
+            return "unlimited"
+        minutes = CLOCK_FRACTIONS.get(initial) or f"{round(initial / 60, 2):g}"
+        return f"{minutes}+{increment}"
+    
+    @staticmethod
+    def _categorical(values: Iterable[str]):
+        labels, codes = np.unique(np.array(list(values), dtype=object), return_inverse=True)
+        return codes.astype(np.int16), tuple(labels)
+    
+    @classmethod
+    def from_rows(cls, rows: List) -> "GameColumns":
+        """Build the arrays from rows selected by AnalyticsService.load"""
+        columns = cls()
+        columns.size = len(rows)
+        
+        (
+            created_at, perf_type, result, user_color, rated,
+            white_rating, black_rating, initial, increment,
+        ) = zip(*rows) if rows else ((),) * 9
+        
+        seconds = np.array(created_at, dtype="datetime64[s]").astype(np.int64)
+        columns.hour = ((seconds // 3600) % 24).astype(np.int8)
+        # 1970-01-01 was a Thursday; shift so Monday is 0
+        columns.weekday = ((seconds // 86400 + 3) % 7).astype(np.int8)
+        
+        columns.result = np.fromiter(
+            (RESULT_CODES[GameResult(r)] for r in result), dtype=np.int8, count=columns.size
+        )
+        columns.color = np.fromiter(
+            (COLOR_CODES[c] for c in user_color), dtype=np.int8, count=columns.size
+        )
+        columns.rated = np.array([bool(r) for r in rated], dtype=bool)
+        
+        # None becomes NaN, so a missing rating leaves the delta invalid
+        white = np.array(white_rating, dtype=np.float32)
+        black = np.array(black_rating, dtype=np.float32)
+        is_white = columns.color == COLOR_CODES["white"]
+        delta = np.where(is_white, black - white, white - black)
+        columns.rating_delta_valid = ~np.isnan(delta)
+        columns.rating_delta = np.digitize(
+            np.nan_to_num(delta), RATING_DELTA_EDGES
+        ).astype(np.int8)
+        
+        columns.perf_type, columns.perf_type_labels = cls._categorical(perf_type)
+        columns.time_control, columns.time_control_labels = cls._categorical(
+            cls.time_control_label(i, inc) for i, inc in zip(initial, increment)
+        )
+        
+        return columns
+    
+    def codes(self, dimension: str):
+        """(codes, labels, mask) for a group-by dimension"""
+        if dimension == "hour":
+            return self.hour, tuple(range(24)), None
+        if dimension == "weekday":
+            return self.weekday, WEEKDAYS, None
+        if dimension == "rating_delta":
+            return self.rating_delta, RATING_DELTA_LABELS, self.rating_delta_valid
+        if dimension == "time_control":
+            return self.time_control, self.time_control_labels, None
+        if dimension == "perf_type":
+            return self.perf_type, self.perf_type_labels, None
+        if dimension == "color":
+            return self.color, COLORS, None
+        raise ValueError(f"Unknown dimension: {dimension}")
+
+
+class AnalyticsService:
+    """
+    Win/draw/loss breakdowns over a user's games, computed in memory.
+    Games are loaded once per user and data version into GameColumns and
+    kept in a small per-worker LRU cache; each breakdown is then a single
+    bincount over the arrays.
+    """
+    
+    # user_id -> (data_version, GameColumns)
+    _cache: "OrderedDict[str, tuple[int, GameColumns]]" = OrderedDict()
+    
+    @classmethod
+    async def load(cls, db: AsyncSession, user: User) -> GameColumns:
+        """Get the user's games as columns, loading them on a cache miss"""
+        entry = cls._cache.get(user.id)
+        if entry is not None and entry[0] == user.data_version:
+            cls._cache.move_to_end(user.id)
+            return entry[1]
+        
+        # Read the version first: games saved meanwhile bump it again,
+        # so a newer version is never cached with older games
+        data_version = user.data_version
+        result = await db.execute(
+            select(*(Game.__table__.c[name] for name in LOADED_COLUMNS))
+            .where(Game.user_id == user.id)
+        )
+        rows = list(result.all())
+        
+        async for month in ArchiveService.stream_games(
+            user.id, user.archived_before, columns=LOADED_COLUMNS
+        ):
+            rows.extend(tuple(getattr(game, name) for name in LOADED_COLUMNS) for game in month)
+        
+        columns = GameColumns.from_rows(rows)
+        
+        cls._cache[user.id] = (data_version, columns)
+        cls._cache.move_to_end(user.id)
+        while len(cls._cache) > settings.ANALYTICS_CACHE_MAX_USERS:
+            cls._cache.popitem(last=False)
+        
+        return columns
+    
+    @staticmethod
+    def breakdown(columns: GameColumns, dimension: str, mask: Optional[np.ndarray] = None) -> List[dict]:
+        """Win/draw/loss counts per group of one dimension"""
+        codes, labels, valid = columns.codes(dimension)
+        if valid is not None:
+            mask = valid if mask is None else mask & valid
+        
+        result = columns.result
+        if mask is not None:
+            codes, result = codes[mask], result[mask]
+        
+        # One pass: count (group, result) pairs, then split by result
+        counts = np.bincount(
+            codes.astype(np.int32) * len(RESULTS) + result,
+            minlength=len(labels) * len(RESULTS),
+        ).reshape(len(labels), len(RESULTS))
+        
+        groups = []
+        for label, (wins, draws, losses) in zip(labels, counts.tolist()):
+            games = wins + draws + losses
+            groups.append({
+                "key": label,
+                "games": games,
+                "wins": wins,
+                "draws": draws,
+                "losses": losses,
+                "win_rate": round(wins / games * 100, 1) if games > 0 else 0,
+            })
+        return groups
+    
+    @staticmethod
+    def breakdowns(
+        columns: GameColumns,
+        dimensions: Iterable[str] = DIMENSIONS,
+        perf_type: Optional[str] = None,
+        rated: Optional[bool] = None,
+        color: Optional[str] = None,
+    ) -> dict:
+        """Answer several breakdowns over the same filtered games"""
+        mask = None
+        
+        def narrow(condition):
+            return condition if mask is None else mask & condition
+        
+        if perf_type:
+            if perf_type in columns.perf_type_labels:
+                code = columns.perf_type_labels.index(perf_type)
+                mask = narrow(columns.perf_type == code)
+            else:
+                mask = np.zeros(columns.size, dtype=bool)
+        if rated is not None:
+            mask = narrow(columns.rated == rated)
+        if color:
+            mask = narrow(columns.color == COLOR_CODES[color])
+        
+        return {
+            "games": int(columns.size if mask is None else mask.sum()),
+            **{
+                dimension: AnalyticsService.breakdown(columns, dimension, mask)
+                for dimension in dimensions
+            },
+        }
@@ -0,0 +1,487 @@
+import asyncio
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.game import Game, GameResult, ANONYMOUS_USERNAME
+from app.models.user import User
+from app.schemas.game import GameFilters
+from app.services.user_cache import UserCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the archive is optional
+    pa = None
+    pq = None
+
+
+# Columns stored per game; user_id is implied by the file's directory
+ARCHIVE_COLUMNS = tuple(c.name for c in Game.__table__.columns if c.name != "user_id")
+
+# Columns the opponent is derived from, for files archived before the
+# opponent columns existed
+OPPONENT_SOURCE_COLUMNS = ("user_color", "white_username", "white_rating", "black_username", "black_rating")
+
+# Games read from the hot table per round trip while archiving
+ARCHIVE_BATCH_SIZE = 1000
+
+
+class ArchiveError(Exception):
+    """The archive is needed but cannot be used"""
+
+
+@lru_cache(maxsize=None)
+def _row_type(columns: Tuple[str, ...]):
+    """Row class with attribute access, like the Core rows of the hot table"""
+    return namedtuple("ArchivedGame", columns)
+
+
+def _archive_schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("rated", pa.bool_()),
+        ("variant", pa.string()),
+        ("speed", pa.string()),
+        ("perf_type", pa.string()),
+        ("time_control_initial", pa.int32()),
+        ("time_control_increment", pa.int32()),
+        ("white_username", pa.string()),
+        ("white_rating", pa.int32()),
+        ("white_rating_diff", pa.int32()),
+        ("black_username", pa.string()),
+        ("black_rating", pa.int32()),
+        ("black_rating_diff", pa.int32()),
+        ("user_color", pa.string()),
+        ("opponent_username", pa.string()),
+        ("opponent_rating", pa.int32()),
+        ("result", pa.string()),
+        ("status", pa.string()),
+        ("winner", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("last_move_at", pa.timestamp("us")),
+        ("opening_eco", pa.string()),
+        ("opening_name", pa.string()),
+    ])
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+class ArchiveService:
+    """
+    Cold games stored as Parquet, one zstd-compressed file per user and
+    month under ARCHIVE_DIR/<user_id>/<YYYY-MM>.parquet.
+    
+    users.archived_before is the cutoff: games played before it are read
+    from the archive and newer ones from the games table. It only moves
+    forward after the files are written and in the same transaction that
+    deletes the archived rows, so readers never see a game twice or miss
+    one. Rollup tables keep counting archived games.
+    """
+    
+    @staticmethod
+    def is_available() -> bool:
+        return pq is not None
+    
+    @staticmethod
+    def _require() -> None:
+        if pq is None:
+            raise ArchiveError("pyarrow is not installed; the game archive is unavailable")
+    
+    @staticmethod
+    def _user_dir(user_id: str) -> str:
+        return os.path.join(settings.ARCHIVE_DIR, user_id)
+    
+    @staticmethod
+    def _month_path(user_id: str, month: datetime) -> str:
+        return os.path.join(ArchiveService._user_dir(user_id), f"{month:%Y-%m}.parquet")
+    
+    @staticmethod
+    def _months(
+        user_id: str,
+        archived_before: datetime,
+        filters: Optional[GameFilters] = None,
+        newest_first: bool = True,
+    ) -> List[str]:
+        """Paths of the user's archived months that can hold games matching filters"""
+        since = filters.since if filters else None
+        until = filters.until if filters else None
+        
+        try:
+            names = os.listdir(ArchiveService._user_dir(user_id))
+        except FileNotFoundError:
+            return []
+        
+        months = []
+        for name in names:
+            if not name.endswith(".parquet"):
+                continue
+            month = datetime.strptime(name[:-len(".parquet")], "%Y-%m")
+            if month >= archived_before:
+                continue
+            if since is not None and _next_month(month) <= since:
+                continue
+            if until is not None and month > until:
+                continue
+            months.append((month, os.path.join(ArchiveService._user_dir(user_id), name)))
+        
+        months.sort(reverse=newest_first)
+        return [path for _, path in months]
+    
+    @staticmethod
+    def _filter_expression(archived_before: datetime, filters: Optional[GameFilters]) -> list:
+        """
+        GameFilters as pyarrow predicates, pushed down to row groups.
+        Games at or after archived_before are left to the games table,
+        even if an interrupted archive run already wrote them.
+        """
+        predicates = [("created_at", "<", archived_before)]
+        if filters is None:
+            return predicates
+        
+        if filters.perf_type:
+            predicates.append(("perf_type", "=", filters.perf_type))
+        if filters.result:
+            predicates.append(("result", "=", filters.result.value))
+        if filters.rated is not None:
+            predicates.append(("rated", "=", filters.rated))
+        if filters.since:
+            predicates.append(("created_at", ">=", filters.since))
+        if filters.until:
+            predicates.append(("created_at", "<=", filters.until))
+        # opponent is matched in iter_games, after older files are filled in
+        return predicates
+    
+    @staticmethod
+    def _read_table(path: str, columns: Optional[Sequence[str]], predicates: list):
+        # With the full schema, columns a file predates read as nulls
+        return pq.read_table(
+            path,
+            columns=list(columns) if columns is not None else None,
+            filters=predicates,
+            schema=_archive_schema(),
+        )
+    
+    @staticmethod
+    def _to_rows(table, user_id: str) -> list:
+        """Table rows as ArchivedGame tuples with the hot table's value types"""
+        row_type = _row_type(("user_id", *table.column_names))
+        rows = []
+        for record in table.to_pylist():
+            if "result" in record:
+                record["result"] = GameResult(record["result"])
+            if "opponent_username" in record and record["opponent_username"] is None:
+                side = "black" if record["user_color"] == "white" else "white"
+                if record[f"{side}_username"] != ANONYMOUS_USERNAME:
+                    record["opponent_username"] = record[f"{side}_username"].lower()
+                record["opponent_rating"] = record[f"{side}_rating"]
+            rows.append(row_type(user_id, *record.values()))
+        return rows
+    
+    @staticmethod
+    def iter_games(
+        user_id: str,
+        archived_before: Optional[datetime],
+        filters: Optional[GameFilters] = None,
+        columns: Optional[Sequence[str]] = None,
+        newest_first: bool = True,
+    ) -> Iterator[list]:
+        """
+        Yield a user's archived games matching filters, one list per month,
+        sorted by (created_at, id). Only the given columns are read, plus
+        created_at and id. Blocking; use stream_games in async code.
+        """
+        if archived_before is None:
+            return
+        ArchiveService._require()
+        
+        opponent = filters.opponent.lower() if filters and filters.opponent else None
+        if columns is not None:
+            extra = ["created_at", "id"]
+            if opponent or any(c.startswith("opponent_") for c in columns):
+                extra += ["opponent_username", "opponent_rating", *OPPONENT_SOURCE_COLUMNS]
+            columns = list(dict.fromkeys([*columns, *extra]))
+        
+        order = "descending" if newest_first else "ascending"
+        predicates = ArchiveService._filter_expression(archived_before, filters)
+        for path in ArchiveService._months(user_id, archived_before, filters, newest_first):
+            table = ArchiveService._read_table(path, columns, predicates)
+            if table.num_rows:
+                table = table.sort_by([("created_at", order), ("id", order)])
+                rows = ArchiveService._to_rows(table, user_id)
+                if opponent:
+                    rows = [r for r in rows if r.opponent_username == opponent]
+                if rows:
+                    yield rows
+    
+    @staticmethod
+    async def stream_games(
+        user_id: str,
+        archived_before: Optional[datetime],
+        filters: Optional[GameFilters] = None,
+        columns: Optional[Sequence[str]] = None,
+        newest_first: bool = True,
+    ) -> AsyncIterator[list]:
+        """iter_games for async code, reading each month in a thread"""
+        months = ArchiveService.iter_games(
+            user_id, archived_before, filters, columns, newest_first
+        )
+        while True:
+            rows = await asyncio.to_thread(next, months, None)
+            if rows is None:
+                return
+            yield rows
+    
+    @staticmethod
+    def _count_games(
+        user_id: str,
+        archived_before: Optional[datetime],
+        filters: Optional[GameFilters],
+    ) -> int:
+        if archived_before is None:
+            return 0
+        ArchiveService._require()
+        
+        if filters and filters.opponent:
+            return sum(
+                len(rows)
+                for rows in ArchiveService.iter_games(user_id, archived_before, filters, ["id"])
+            )
+        
+        predicates = ArchiveService._filter_expression(archived_before, filters)
+        return sum(
+            ArchiveService._read_table(path, ["id"], predicates).num_rows
+            for path in ArchiveService._months(user_id, archived_before, filters)
+        )
+    
+    @staticmethod
+    async def count_games(
+        user_id: str,
+        archived_before: Optional[datetime],
+        filters: Optional[GameFilters] = None,
+    ) -> int:
+        """Count a user's archived games matching filters"""
+        return await asyncio.to_thread(
+            ArchiveService._count_games, user_id, archived_before, filters
+        )
+    
+    @staticmethod
+    def _get_page(
+        user_id: str,
+        archived_before: Optional[datetime],
+        filters: Optional[GameFilters],
+        before: Optional[Tuple[datetime, str]],
+        offset: int,
+        limit: int,
+    ) -> list:
+        if before is not None:
+            # Skip months entirely after the cursor
+            until = before[0]
+            if filters and filters.until:
+                until = min(until, filters.until)
+            filters = (filters or GameFilters()).model_copy(update={"until": until})
+        
+        page = []
+        for rows in ArchiveService.iter_games(user_id, archived_before, filters):
+            if before is not None:
+                rows = [r for r in rows if (r.created_at, r.id) < before]
+            if offset >= len(rows):
+                offset -= len(rows)
+                continue
+            page.extend(rows[offset:offset + limit - len(page)])
+            offset = 0
+            if len(page) >= limit:
+                break
+        return page
+    
+    @staticmethod
+    async def get_page(
+        user_id: str,
+        archived_before: Optional[datetime],
+        filters: Optional[GameFilters] = None,
+        before: Optional[Tuple[datetime, str]] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> list:
+        """
+        Get archived games in the list order, (created_at, id) descending,
+        starting after the `before` position and skipping `offset` games.
+        """
+        return await asyncio.to_thread(
+            ArchiveService._get_page, user_id, archived_before, filters, before, offset, limit
+        )
+    
+    @staticmethod
+    def _get_game(user_id: str, archived_before: Optional[datetime], game_id: str):
+        if archived_before is None:
+            return None
+        ArchiveService._require()
+        
+        predicates = [("id", "=", game_id), ("created_at", "<", archived_before)]
+        for path in ArchiveService._months(user_id, archived_before):
+            table = ArchiveService._read_table(path, None, predicates)
+            if table.num_rows:
+                return ArchiveService._to_rows(table, user_id)[0]
+        return None
+    
+    @staticmethod
+    async def get_game(user_id: str, archived_before: Optional[datetime], game_id: str):
+        """Get a single archived game, or None"""
+        return await asyncio.to_thread(
+            ArchiveService._get_game, user_id, archived_before, game_id
+        )
+    
+    @staticmethod
+    def _write_month(user_id: str, month: datetime, games: List[dict]) -> None:
+        """Merge games into a month file, replacing it atomically"""
+        path = ArchiveService._month_path(user_id, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        schema = _archive_schema()
+        table = pa.Table.from_pylist(games, schema=schema)
+        if os.path.exists(path):
+            # Keep what was archived before; a retried run re-adds nothing
+            existing = pq.read_table(path, schema=schema)
+            archived_ids = set(existing.column("id").to_pylist())
+            table = pa.concat_tables([
+                existing,
+                pa.Table.from_pylist(
+                    [g for g in games if g["id"] not in archived_ids], schema=schema
+                ),
+            ])
+        
+        table = table.sort_by([("created_at", "ascending"), ("id", "ascending")])
+        tmp_path = f"{path}.tmp"
+        pq.write_table(
+            table,
+            tmp_path,
+            compression="zstd",
+            use_dictionary=["variant", "speed", "perf_type", "user_color", "result", "status", "winner"],
+        )
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _by_month(games: List[dict]) -> dict:
+        months = {}
+        for game in games:
+            months.setdefault(_month_start(game["created_at"]), []).append(game)
+        return months
+    
+    @staticmethod
+    def _missing_games(user_id: str, games: List[dict]) -> List[dict]:
+        missing = []
+        for month, month_games in ArchiveService._by_month(games).items():
+            path = ArchiveService._month_path(user_id, month)
+            archived_ids = set()
+            if os.path.exists(path):
+                archived_ids = set(pq.read_table(path, columns=["id"]).column("id").to_pylist())
+            missing.extend(g for g in month_games if g["id"] not in archived_ids)
+        return missing
+    
+    @staticmethod
+    async def missing_games(user_id: str, games: List[dict]) -> List[dict]:
+        """Those of the given game rows that are not in the user's month files"""
+        ArchiveService._require()
+        return await asyncio.to_thread(ArchiveService._missing_games, user_id, games)
+    
+    @staticmethod
+    def _add_games(user_id: str, games: List[dict]) -> None:
+        for month, month_games in ArchiveService._by_month(games).items():
+            rows = [
+                {
+                    **{name: game.get(name) for name in ARCHIVE_COLUMNS},
+                    "result": GameResult(game["result"]).value,
+                }
+                for game in month_games
+            ]
+            ArchiveService._write_month(user_id, month, rows)
+    
+    @staticmethod
+    async def add_games(user_id: str, games: List[dict]) -> None:
+        """
+        Write game rows older than the user's cutoff straight into the
+        month files, e.g. old games a sync finds that were never stored.
+        The caller adds them to the rollups.
+        """
+        ArchiveService._require()
+        await asyncio.to_thread(ArchiveService._add_games, user_id, games)
+    
+    @staticmethod
+    def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+        """Start of the month that is ARCHIVE_AFTER_DAYS old; months are archived whole"""
+        now = now or datetime.utcnow()
+        return _month_start(now - timedelta(days=settings.ARCHIVE_AFTER_DAYS))
+    
+    @staticmethod
+    async def archive_user_games(
+        db: AsyncSession,
+        user: User,
+        cutoff: Optional[datetime] = None,
+    ) -> int:
+        """
+        Move the user's games played before cutoff to the archive.
+        Files are written first; the rows are deleted and
+        users.archived_before advanced in one transaction afterwards.
+        Returns the number of games archived.
+        """
+        ArchiveService._require()
+        
+        cutoff = cutoff or ArchiveService.archive_cutoff()
+        if user.archived_before is not None and cutoff <= user.archived_before:
+            return 0
+        
+        archived_ids = set()
+        month = None
+        games = []
+        
+        result = await db.stream(
+            select(*(Game.__table__.c[name] for name in ARCHIVE_COLUMNS))
+            .where(Game.user_id == user.id, Game.created_at < cutoff)
+            .order_by(Game.created_at, Game.id)
+            .execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+        )
+        async for row in result:
+            game = row._asdict()
+            game["result"] = GameResult(game["result"]).value
+            game_month = _month_start(game["created_at"])
+            if month is not None and game_month != month:
+                await asyncio.to_thread(ArchiveService._write_month, user.id, month, games)
+                games = []
+            month = game_month
+            games.append(game)
+            archived_ids.add(game["id"])
+        
+        if games:
+            await asyncio.to_thread(ArchiveService._write_month, user.id, month, games)
+        
+        deleted = await db.execute(
+            delete(Game)
+            .where(Game.user_id == user.id, Game.created_at < cutoff)
+            .returning(Game.id)
+        )
+        if not set(deleted.scalars().all()) <= archived_ids:
+            # A game older than the cutoff arrived after the files were
+            # written; keep everything hot and let the next run pick it up
+            await db.rollback()
+            raise ArchiveError(f"Games of {user.id} changed while archiving")
+        
+        await db.execute(
+            update(User).where(User.id == user.id).values(archived_before=cutoff)
+        )
+        await db.commit()
+        await db.refresh(user, ["archived_before"])
+        await UserCache.invalidate(user.id)
+        
+        return len(archived_ids)
@@ -7,13 +7,14 @@ from jose import JWTError, jwt
 
 from app.config import settings
 from app.schemas.auth import TokenData
+from app.services.pkce_store import PKCEStore, create_pkce_store
 
 
 class AuthService:
     """Service for authentication operations"""
     
-    # In-memory storage for PKCE verifiers (in production, use Redis)
-    _pkce_store: dict[str, str] = {}
+    # Storage for PKCE verifiers, shared by workers unless configured otherwise
+    _pkce_store: PKCEStore = create_pkce_store()
     
     @staticmethod
     def generate_pkce_pair() -> tuple[str, str]:
@@ -33,14 +34,16 @@ class AuthService:
         return secrets.token_urlsafe(32)
     
     @classmethod
-    def store_pkce_verifier(cls, state: str, verifier: str) -> None:
+    async def store_pkce_verifier(cls, state: str, verifier: str) -> None:
         """Store PKCE verifier associated with state"""
-        cls._pkce_store[state] = verifier
+        await cls._pkce_store.put(state, verifier)
     
     @classmethod
-    def get_pkce_verifier(cls, state: str) -> Optional[str]:
+    async def get_pkce_verifier(cls, state: Optional[str]) -> Optional[str]:
         """Get and remove PKCE verifier for state"""
-        return cls._pkce_store.pop(state, None)
+        if not state:
+            return None
+        return await cls._pkce_store.pop(state)
     
     @staticmethod
     def get_lichess_auth_url(state: str, code_challenge: str) -> str:
@@ -96,6 +99,6 @@ class AuthService:
             if user_id is None:
                 return None
             
-            return TokenData(user_id=user_id, username=username)
+            return TokenData(user_id=user_id, username=username, exp=payload.get("exp"))
         except JWTError:
             return None
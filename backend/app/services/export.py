@@ -0,0 +1,111 @@
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import orjson
+
+from app.database import AsyncSessionLocal
+from app.schemas.game import GameFilters
+from app.services.game import GameService
+
+
+# Columns of a CSV export, in order; same fields as the JSON export
+EXPORT_FIELDS = (
+    "id",
+    "rated",
+    "variant",
+    "speed",
+    "perf_type",
+    "time_control_initial",
+    "time_control_increment",
+    "white_username",
+    "white_rating",
+    "white_rating_diff",
+    "black_username",
+    "black_rating",
+    "black_rating_diff",
+    "user_color",
+    "result",
+    "status",
+    "winner",
+    "created_at",
+    "last_move_at",
+    "opening_eco",
+    "opening_name",
+    "opponent_username",
+    "opponent_rating",
+    "lichess_url",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class ExportService:
+    """
+    Encode a user's games for download, one chunk per streamed batch.
+    Generators open their own session: a StreamingResponse body runs
+    after request dependencies such as get_db have been closed.
+    """
+    
+    @staticmethod
+    async def _batches(
+        user_id: str,
+        filters: Optional[GameFilters],
+        archived_before: Optional[datetime],
+    ):
+        async with AsyncSessionLocal() as db:
+            async for batch in GameService.stream_user_games(
+                db, user_id, filters, archived_before=archived_before
+            ):
+                yield batch
+    
+    @staticmethod
+    async def iter_ndjson(
+        user_id: str,
+        filters: Optional[GameFilters] = None,
+        archived_before: Optional[datetime] = None,
+    ) -> AsyncIterator[bytes]:
+        """Games as newline-delimited JSON"""
+        async for batch in ExportService._batches(user_id, filters, archived_before):
+            yield b"".join(
+                orjson.dumps(GameService.game_to_dict(game)) + b"\n" for game in batch
+            )
+    
+    @staticmethod
+    def _csv_value(value):
+        if isinstance(value, enum.Enum):
+            return value.value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+    
+    @staticmethod
+    async def iter_csv(
+        user_id: str,
+        filters: Optional[GameFilters] = None,
+        archived_before: Optional[datetime] = None,
+    ) -> AsyncIterator[bytes]:
+        """Games as CSV with a header row"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        def flush() -> bytes:
+            chunk = buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+        
+        # Header goes out before the first query returns
+        writer.writerow(EXPORT_FIELDS)
+        yield flush()
+        
+        async for batch in ExportService._batches(user_id, filters, archived_before):
+            for game in batch:
+                row = GameService.game_to_dict(game)
+                writer.writerow([ExportService._csv_value(row[field]) for field in EXPORT_FIELDS])
+            yield flush()
@@ -1,171 +1,661 @@
-from typing import Optional, List, Tuple
+import base64
+import binascii
+import json
+from types import SimpleNamespace
+from typing import Optional, List, Tuple, AsyncIterator
 from datetime import datetime
-from sqlalchemy import select, func, desc
+from sqlalchemy import Row, select, update, func, desc, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.game import Game, GameResult
+from app.config import settings
+from app.models.game import Game, GameResult, ANONYMOUS_USERNAME
 from app.models.user import User
 from app.schemas.game import GameResponse, GameFilters
+from app.services.archive import ArchiveService
+from app.services.lichess import LichessService
+from app.services.stats import StatsService, RESULT_COLUMNS
+from app.services.sync_lease import SyncConflict
+from app.services.user import UserService
+from app.services.user_cache import UserCache
+
+
+# Rows per INSERT statement; keeps bind parameters well under the
+# asyncpg limit of 32767 per statement
+INSERT_BATCH_SIZE = 500
+
+# Games buffered from a Lichess stream before they are flushed
+STREAM_BATCH_SIZE = 100
+
+# Read endpoints select these Core columns and get plain rows back,
+# skipping ORM identity-map and instrumentation work; writes use the ORM
+GAME_COLUMNS = tuple(Game.__table__.columns)
+
+# Rows fetched per round trip when streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+# Watermark key for syncs not filtered by perf type
+ALL_PERF_TYPES = "all"
+
+
+class InvalidCursor(Exception):
+    """A pagination cursor that encode_cursor did not produce"""
 
 
 class GameService:
     """Service for game operations"""
     
     @staticmethod
-    async def get_user_games(
-        db: AsyncSession,
-        user_id: str,
-        page: int = 1,
-        page_size: int = 20,
-        filters: Optional[GameFilters] = None,
-    ) -> Tuple[List[Game], int]:
-        """Get paginated games for a user with optional filters"""
-        # Base query
-        query = select(Game).where(Game.user_id == user_id)
-        count_query = select(func.count()).select_from(Game).where(Game.user_id == user_id)
-        
-        # Apply filters
+    def apply_filters(query, filters: Optional[GameFilters]):
+        """Apply list filters to a games query"""
         if filters:
             if filters.perf_type:
                 query = query.where(Game.perf_type == filters.perf_type)
-                count_query = count_query.where(Game.perf_type == filters.perf_type)
             
             if filters.result:
                 query = query.where(Game.result == filters.result)
-                count_query = count_query.where(Game.result == filters.result)
             
             if filters.rated is not None:
                 query = query.where(Game.rated == filters.rated)
-                count_query = count_query.where(Game.rated == filters.rated)
             
             if filters.since:
                 query = query.where(Game.created_at >= filters.since)
-                count_query = count_query.where(Game.created_at >= filters.since)
             
             if filters.until:
                 query = query.where(Game.created_at <= filters.until)
-                count_query = count_query.where(Game.created_at <= filters.until)
+            
+            if filters.opponent:
+                query = query.where(Game.opponent_username == filters.opponent.lower())
         
-        # Order by date descending
-        query = query.order_by(desc(Game.created_at))
+        return query
+    
+    @staticmethod
+    def encode_cursor(game: Row) -> str:
+        """Encode a game's position in the (created_at, id) ordering"""
+        raw = json.dumps([game.created_at.isoformat(), game.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Decode a cursor from encode_cursor. Raises InvalidCursor if malformed."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, game_id = json.loads(base64.urlsafe_b64decode(padded))
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError, binascii.Error) as e:
+            raise InvalidCursor("Invalid cursor") from e
+        # created_at is stored naive; an aware datetime cannot be compared with it
+        if created_at.tzinfo is not None:
+            raise InvalidCursor("Invalid cursor")
+        return created_at, str(game_id)
+    
+    @staticmethod
+    async def count_user_games(
+        db: AsyncSession,
+        user_id: str,
+        filters: Optional[GameFilters] = None,
+        archived_before: Optional[datetime] = None,
+    ) -> int:
+        """
+        Count a user's games matching filters.
+        Filters on perf type and result only are answered exactly from the
+        user_game_stats rollup, which includes archived games; anything
+        else falls back to COUNT(*) plus a count of the archive.
+        """
+        if filters is None or (
+            filters.rated is None
+            and filters.since is None
+            and filters.until is None
+            and filters.opponent is None
+        ):
+            column = "games"
+            if filters and filters.result:
+                column = RESULT_COLUMNS[GameResult(filters.result.value)]
+            
+            return sum(
+                getattr(row, column)
+                for row in await StatsService.get_rollup(db, user_id)
+                if not (filters and filters.perf_type) or row.perf_type == filters.perf_type
+            )
         
-        # Pagination
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+        archived = await ArchiveService.count_games(user_id, archived_before, filters)
+        return await GameService._count_hot_games(db, user_id, filters) + archived
+    
+    @staticmethod
+    async def _count_hot_games(
+        db: AsyncSession,
+        user_id: str,
+        filters: Optional[GameFilters] = None,
+    ) -> int:
+        count_query = GameService.apply_filters(
+            select(func.count()).select_from(Game).where(Game.user_id == user_id),
+            filters,
+        )
+        result = await db.execute(count_query)
+        return result.scalar()
+    
+    @staticmethod
+    async def get_user_stats(
+        db: AsyncSession,
+        user_id: str,
+        filters: Optional[GameFilters] = None,
+        archived_before: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Get game statistics for a user's games matching filters.
+        Without filters other than perf type the user_game_stats rollup
+        answers it; otherwise every breakdown comes from one aggregate
+        query over the matching games, plus the matching archived games.
+        """
+        if filters is None or (
+            filters.rated is None
+            and filters.since is None
+            and filters.until is None
+            and filters.opponent is None
+        ):
+            return await StatsService.get_user_stats(
+                db, user_id, perf_type=filters.perf_type if filters else None
+            )
         
-        # Execute queries
+        query = GameService.apply_filters(StatsService.aggregate_query(user_id), filters)
         result = await db.execute(query)
-        games = result.scalars().all()
+        rows = list(result.all())
         
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        # A month of archived games at a time, folded into a few rows
+        async for month in ArchiveService.stream_games(
+            user_id, archived_before, filters, columns=StatsService.AGGREGATE_COLUMNS
+        ):
+            rows.extend(StatsService.aggregate_games(month))
         
-        return list(games), total
+        return StatsService.summarize(rows)
     
     @staticmethod
-    async def save_games_from_lichess(
+    async def get_user_games(
         db: AsyncSession,
-        user: User,
-        lichess_games: List[dict],
-    ) -> int:
-        """Save games from Lichess API response"""
-        saved_count = 0
+        user_id: str,
+        page: int = 1,
+        page_size: int = 20,
+        filters: Optional[GameFilters] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        archived_before: Optional[datetime] = None,
+    ) -> Tuple[List[Row], Optional[int], Optional[str]]:
+        """
+        Get paginated games for a user with optional filters.
+        Returns (games, total, next_cursor). Games are read-only rows with
+        the columns of Game as attributes, not ORM instances.
+        
+        Games are ordered by (created_at, id) descending. With a cursor the
+        page starts right after the cursor's game (keyset pagination), so
+        its cost does not depend on how deep the page is; page is ignored.
+        next_cursor is None on the last page. total is None unless
+        include_total is set. Raises InvalidCursor for a malformed cursor.
+        
+        Pages continue from the games table into the user's archived games
+        (those played before archived_before).
+        """
+        query = GameService.apply_filters(
+            select(*GAME_COLUMNS).where(Game.user_id == user_id),
+            filters,
+        )
+        
+        position = None
+        if cursor:
+            position = GameService.decode_cursor(cursor)
+            query = query.where(tuple_(Game.created_at, Game.id) < tuple_(*position))
+        else:
+            query = query.offset((page - 1) * page_size)
+        
+        # Order by date descending, id breaks ties so pages are stable.
+        # One extra row tells whether there is a next page.
+        query = query.order_by(desc(Game.created_at), desc(Game.id)).limit(page_size + 1)
+        
+        result = await db.execute(query)
+        games = list(result.all())
+        
+        if archived_before is not None and len(games) <= page_size:
+            # Every archived game is older than every hot one, so the
+            # archive picks up where the games table ran out
+            archive_offset = 0
+            if position is None and not games and page > 1:
+                hot_total = await GameService._count_hot_games(db, user_id, filters)
+                archive_offset = max(0, (page - 1) * page_size - hot_total)
+            games.extend(
+                await ArchiveService.get_page(
+                    user_id,
+                    archived_before,
+                    filters,
+                    before=position,
+                    offset=archive_offset,
+                    limit=page_size + 1 - len(games),
+                )
+            )
+        
+        next_cursor = None
+        if len(games) > page_size:
+            games = games[:page_size]
+            next_cursor = GameService.encode_cursor(games[-1])
+        
+        total = None
+        if include_total:
+            total = await GameService.count_user_games(db, user_id, filters, archived_before)
+        
+        return games, total, next_cursor
+    
+    @staticmethod
+    async def stream_user_games(
+        db: AsyncSession,
+        user_id: str,
+        filters: Optional[GameFilters] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        archived_before: Optional[datetime] = None,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Stream all of a user's games matching filters in batches, newest
+        first, from a server-side cursor and then the archive. Only one
+        batch, or one archived month, is held in memory.
+        """
+        query = GameService.apply_filters(
+            select(*GAME_COLUMNS).where(Game.user_id == user_id),
+            filters,
+        )
+        query = query.order_by(desc(Game.created_at), desc(Game.id))
+        
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            yield batch
+        
+        async for month in ArchiveService.stream_games(user_id, archived_before, filters):
+            for start in range(0, len(month), batch_size):
+                yield month[start:start + batch_size]
+    
+    @staticmethod
+    async def get_user_game(
+        db: AsyncSession,
+        user_id: str,
+        game_id: str,
+        archived_before: Optional[datetime] = None,
+    ) -> Optional[Row]:
+        """Get a single game of a user as a read-only row, hot or archived"""
+        result = await db.execute(
+            select(*GAME_COLUMNS).where(
+                Game.id == game_id,
+                Game.user_id == user_id,
+            )
+        )
+        game = result.one_or_none()
+        if game is None:
+            game = await ArchiveService.get_game(user_id, archived_before, game_id)
+        return game
+    
+    @staticmethod
+    def parse_lichess_game(game_data: dict, user: User) -> Optional[dict]:
+        """Normalize a Lichess API game into a row for the games table.
+        
+        Returns None if the user did not play in the game.
+        """
         username_lower = user.username.lower()
         
-        for game_data in lichess_games:
-            game_id = game_data["id"]
-            
-            # Check if game already exists
-            existing = await db.execute(
-                select(Game).where(Game.id == game_id)
+        # Determine user's color
+        players = game_data.get("players", {})
+        white = players.get("white", {})
+        black = players.get("black", {})
+        
+        white_user = white.get("user", {})
+        black_user = black.get("user", {})
+        
+        white_username = white_user.get("name", white_user.get("id", ANONYMOUS_USERNAME))
+        black_username = black_user.get("name", black_user.get("id", ANONYMOUS_USERNAME))
+        
+        if white_username.lower() == username_lower:
+            user_color = "white"
+            opponent, opponent_user = black, black_user
+        elif black_username.lower() == username_lower:
+            user_color = "black"
+            opponent, opponent_user = white, white_user
+        else:
+            return None
+        
+        # AI and anonymous opponents have no account to group games by
+        opponent_username = opponent_user.get("id")
+        
+        # Determine result
+        winner = game_data.get("winner")
+        if winner is None:
+            result = GameResult.DRAW
+        elif winner == user_color:
+            result = GameResult.WIN
+        else:
+            result = GameResult.LOSS
+        
+        # Parse timestamps
+        created_at = datetime.fromtimestamp(game_data["createdAt"] / 1000)
+        
+        last_move_at = None
+        if game_data.get("lastMoveAt"):
+            last_move_at = datetime.fromtimestamp(game_data["lastMoveAt"] / 1000)
+        
+        # Parse time control
+        clock = game_data.get("clock", {})
+        
+        # Parse opening
+        opening = game_data.get("opening", {})
+        
+        return {
+            "id": game_data["id"],
+            "user_id": user.id,
+            "rated": game_data.get("rated", True),
+            "variant": game_data.get("variant", "standard"),
+            "speed": game_data.get("speed", "unknown"),
+            "perf_type": game_data.get("perf", game_data.get("speed", "unknown")),
+            "time_control_initial": clock.get("initial"),
+            "time_control_increment": clock.get("increment"),
+            "white_username": white_username,
+            "white_rating": white.get("rating"),
+            "white_rating_diff": white.get("ratingDiff"),
+            "black_username": black_username,
+            "black_rating": black.get("rating"),
+            "black_rating_diff": black.get("ratingDiff"),
+            "user_color": user_color,
+            "opponent_username": opponent_username.lower() if opponent_username else None,
+            "opponent_rating": opponent.get("rating"),
+            "result": result,
+            "status": game_data.get("status", "unknown"),
+            "winner": winner,
+            "created_at": created_at,
+            "last_move_at": last_move_at,
+            "opening_eco": opening.get("eco"),
+            "opening_name": opening.get("name"),
+        }
+    
+    @staticmethod
+    async def insert_games(db: AsyncSession, rows: List[dict]) -> int:
+        """
+        Insert normalized game rows, skipping games that already exist.
+        Uses multi-row INSERT ... ON CONFLICT DO NOTHING and counts the
+        rows actually written via RETURNING. The rows returned are also
+        added to the stats rollups. Does not commit.
+        """
+        saved_count = 0
+        
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            chunk = rows[start:start + INSERT_BATCH_SIZE]
+            stmt = (
+                pg_insert(Game)
+                .values(chunk)
+                .on_conflict_do_nothing(index_elements=[Game.user_id, Game.id])
+                .returning(
+                    Game.id,
+                    Game.user_id,
+                    Game.perf_type,
+                    Game.user_color,
+                    Game.result,
+                    Game.white_rating,
+                    Game.black_rating,
+                    Game.created_at,
+                    Game.opening_eco,
+                    Game.opening_name,
+                )
             )
-            if existing.scalar_one_or_none():
-                continue
-            
-            # Determine user's color
-            players = game_data.get("players", {})
-            white = players.get("white", {})
-            black = players.get("black", {})
-            
-            white_user = white.get("user", {})
-            black_user = black.get("user", {})
-            
-            white_username = white_user.get("name", white_user.get("id", "Anonymous"))
-            black_username = black_user.get("name", black_user.get("id", "Anonymous"))
+            result = await db.execute(stmt)
+            inserted = result.all()
             
-            if white_username.lower() == username_lower:
-                user_color = "white"
-            elif black_username.lower() == username_lower:
-                user_color = "black"
-            else:
-                # User not found in game, skip
-                continue
-            
-            # Determine result
-            winner = game_data.get("winner")
-            if winner is None:
-                result = GameResult.DRAW
-            elif winner == user_color:
-                result = GameResult.WIN
-            else:
-                result = GameResult.LOSS
-            
-            # Parse timestamps
-            created_at = datetime.fromtimestamp(game_data["createdAt"] / 1000)
-            last_move_at = None
-            if game_data.get("lastMoveAt"):
-                last_move_at = datetime.fromtimestamp(game_data["lastMoveAt"] / 1000)
-            
-            # Parse time control
-            clock = game_data.get("clock", {})
-            time_control_initial = clock.get("initial")
-            time_control_increment = clock.get("increment")
+            await StatsService.apply_inserted_games(db, inserted)
+            saved_count += len(inserted)
+        
+        return saved_count
+    
+    @staticmethod
+    async def save_games_from_stream(
+        db: AsyncSession,
+        user: User,
+        lichess_games: AsyncIterator[dict],
+        batch_size: int = STREAM_BATCH_SIZE,
+        watermark_key: Optional[str] = None,
+        watermark_floor: Optional[int] = None,
+        max_games: Optional[int] = None,
+        fencing_token: Optional[int] = None,
+    ) -> Tuple[int, int]:
+        """
+        Save games from a Lichess NDJSON stream as they arrive.
+        Games are flushed to the database in fixed-size batches while the
+        HTTP stream is still open, so memory stays flat regardless of how
+        many games are pulled. If watermark_key is given, the newest
+        createdAt seen is recorded under it in user.games_sync_watermarks.
+        For a newest-first stream capped at max_games, pass the current
+        watermark as watermark_floor: the watermark then only advances if
+        the stream ended early or reached back to the floor, so no games
+        are skipped.
+        With a fencing_token the whole sync is rolled back (SyncConflict)
+        if a newer sync has been issued a token since this one.
+        
+        Games played before the user's archive cutoff do not belong in the
+        games table. Those missing from the archive (older than anything
+        synced before) are written to its month files right before the
+        commit and added to the rollups. If the commit then fails, the
+        rollups miss them until rebuild_user_stats runs.
+        Returns (fetched, saved).
+        """
+        fetched = 0
+        saved_count = 0
+        newest_created_at = None
+        oldest_created_at = None
+        batch = {}
+        cold = {}
+        
+        async for game_data in lichess_games:
+            fetched += 1
+            created_at = game_data.get("createdAt")
+            if created_at is not None:
+                if newest_created_at is None or created_at > newest_created_at:
+                    newest_created_at = created_at
+                if oldest_created_at is None or created_at < oldest_created_at:
+                    oldest_created_at = created_at
             
-            # Parse opening
-            opening = game_data.get("opening", {})
-            opening_eco = opening.get("eco")
-            opening_name = opening.get("name")
+            row = GameService.parse_lichess_game(game_data, user)
+            if row is not None:
+                if user.archived_before is not None and row["created_at"] < user.archived_before:
+                    cold.setdefault(row["id"], row)
+                else:
+                    batch.setdefault(row["id"], row)
             
-            # Create game record
-            game = Game(
-                id=game_id,
-                user_id=user.id,
-                rated=game_data.get("rated", True),
-                variant=game_data.get("variant", "standard"),
-                speed=game_data.get("speed", "unknown"),
-                perf_type=game_data.get("perf", game_data.get("speed", "unknown")),
-                time_control_initial=time_control_initial,
-                time_control_increment=time_control_increment,
-                white_username=white_username,
-                white_rating=white.get("rating"),
-                white_rating_diff=white.get("ratingDiff"),
-                black_username=black_username,
-                black_rating=black.get("rating"),
-                black_rating_diff=black.get("ratingDiff"),
-                user_color=user_color,
-                result=result,
-                status=game_data.get("status", "unknown"),
-                winner=winner,
-                created_at=created_at,
-                last_move_at=last_move_at,
-                opening_eco=opening_eco,
-                opening_name=opening_name,
+            if len(batch) >= batch_size:
+                saved_count += await GameService.insert_games(db, list(batch.values()))
+                batch = {}
+        
+        if batch:
+            saved_count += await GameService.insert_games(db, list(batch.values()))
+        
+        unarchived = []
+        if cold:
+            unarchived = await ArchiveService.missing_games(user.id, list(cold.values()))
+            await StatsService.apply_inserted_games(
+                db, (SimpleNamespace(**row) for row in unarchived)
             )
-            
-            db.add(game)
-            saved_count += 1
+            saved_count += len(unarchived)
+        
+        # A capped stream that stopped above the floor left a gap under it
+        gapless = (
+            watermark_floor is None
+            or max_games is None
+            or fetched < max_games
+            or (oldest_created_at is not None and oldest_created_at <= watermark_floor)
+        )
+        
+        watermark_advanced = False
+        if watermark_key and newest_created_at is not None and gapless:
+            watermarks = dict(user.games_sync_watermarks or {})
+            if newest_created_at > watermarks.get(watermark_key, 0):
+                watermarks[watermark_key] = newest_created_at
+                # Reassign so the JSON column is flagged as modified
+                user.games_sync_watermarks = watermarks
+                watermark_advanced = True
         
         if saved_count > 0:
             # Update user's last sync time
             user.last_games_sync = datetime.utcnow()
+            UserService.bump_data_version(user)
+        
+        if saved_count > 0 or watermark_advanced:
+            if fencing_token is not None:
+                await GameService._check_sync_fence(db, user, fencing_token)
+            if unarchived:
+                await ArchiveService.add_games(user.id, unarchived)
             await db.commit()
+            if saved_count > 0:
+                await db.refresh(user, ["data_version"])
+            await UserCache.invalidate(user.id)
         
-        return saved_count
+        return fetched, saved_count
     
     @staticmethod
-    def game_to_response(game: Game) -> GameResponse:
-        """Convert Game model to GameResponse schema"""
-        # Determine opponent
+    async def issue_sync_fence(db: AsyncSession, user: User) -> int:
+        """
+        Issue the next fencing token for a sync of user from users.sync_fence.
+        Commits, so the token is durable before the sync starts.
+        """
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(sync_fence=func.coalesce(User.sync_fence, 0) + 1)
+            .returning(User.sync_fence)
+        )
+        token = result.scalar_one()
+        await db.commit()
+        return token
+    
+    @staticmethod
+    async def _check_sync_fence(db: AsyncSession, user: User, fencing_token: int) -> None:
+        """
+        Roll back if a newer sync has been issued a token since this one.
+        Otherwise the user row stays locked until commit, so no newer sync
+        can start in between.
+        """
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id, User.sync_fence == fencing_token)
+            .values(sync_fence=fencing_token)
+        )
+        if result.rowcount == 0:
+            await db.rollback()
+            raise SyncConflict("A newer sync for this user has started")
+    
+    @staticmethod
+    def get_sync_watermark(user: User, perf_type: Optional[str] = None) -> Optional[int]:
+        """
+        Get the newest createdAt (ms) already synced for perf_type.
+        A full sync covers every perf type, so its watermark also applies
+        to per-perf-type syncs.
+        """
+        watermarks = user.games_sync_watermarks or {}
+        candidates = [watermarks.get(ALL_PERF_TYPES)]
+        if perf_type:
+            candidates.append(watermarks.get(perf_type))
+        
+        candidates = [c for c in candidates if c is not None]
+        return max(candidates) if candidates else None
+    
+    @staticmethod
+    def get_sync_since(watermark: int) -> datetime:
+        """
+        Get the lower bound for an incremental sync from its watermark.
+        
+        Lichess filters exports on createdAt, but a game only appears once
+        it has finished. A game that started before the newest game of the
+        last sync and finished after it (correspondence, simuls) would sit
+        below the watermark for good, so the sync re-reads the last
+        SYNC_WATERMARK_OVERLAP seconds; games it already has are dropped by
+        the insert's ON CONFLICT DO NOTHING. Games that take longer than
+        the overlap are only picked up by a full sync.
+        """
+        return datetime.fromtimestamp(watermark / 1000 - settings.SYNC_WATERMARK_OVERLAP)
+    
+    @staticmethod
+    async def _take_new_games(
+        lichess_games: AsyncIterator[dict],
+        watermark: int,
+        max_games: int,
+    ) -> AsyncIterator[dict]:
+        """
+        Yield games until max_games created after watermark have been seen.
+        Games in the overlap window do not count, so a window holding more
+        than max_games games cannot stop the watermark from advancing.
+        """
+        new_games = 0
+        try:
+            async for game_data in lichess_games:
+                yield game_data
+                if game_data.get("createdAt", 0) > watermark:
+                    new_games += 1
+                    if new_games >= max_games:
+                        break
+        finally:
+            # Close the HTTP stream now rather than when collected
+            await lichess_games.aclose()
+    
+    @staticmethod
+    async def sync_games_from_lichess(
+        db: AsyncSession,
+        user: User,
+        lichess_service: LichessService,
+        max_games: int = 50,
+        perf_type: Optional[str] = None,
+        incremental: bool = True,
+        fencing_token: Optional[int] = None,
+    ) -> Tuple[int, int]:
+        """
+        Sync user's games from Lichess. Returns (fetched, saved).
+        
+        Incremental syncs only request games from shortly before the user's
+        watermark (see get_sync_since) and stop after max_games newer ones.
+        They are fetched oldest first so that a capped sync leaves no gap:
+        the next sync continues where this one stopped.
+        
+        Other syncs fetch the newest max_games games. If they stop before
+        reaching the old watermark, the games in between are still
+        missing, so the watermark is left where it was.
+        """
+        watermark = GameService.get_sync_watermark(user, perf_type)
+        watermark_floor = None
+        
+        if not incremental or watermark is None:
+            lichess_games = lichess_service.iter_user_games(
+                username=user.username,
+                max_games=max_games,
+                perf_type=perf_type,
+            )
+            watermark_floor = watermark
+        else:
+            lichess_games = GameService._take_new_games(
+                lichess_service.iter_user_games(
+                    username=user.username,
+                    max_games=None,
+                    perf_type=perf_type,
+                    since=GameService.get_sync_since(watermark),
+                    sort="dateAsc",
+                ),
+                watermark,
+                max_games,
+            )
+        
+        return await GameService.save_games_from_stream(
+            db,
+            user=user,
+            lichess_games=lichess_games,
+            watermark_key=perf_type or ALL_PERF_TYPES,
+            watermark_floor=watermark_floor,
+            max_games=max_games,
+            fencing_token=fencing_token,
+        )
+    
+    @staticmethod
+    def game_to_dict(game: Row) -> dict:
+        """
+        Convert a game row to a plain dict with the GameResponse fields.
+        Used as is by the orjson fast path, which skips Pydantic.
+        """
+        # Opponent with the name as Lichess displays it; the stored
+        # opponent_username is lowercased for lookups
         if game.user_color == "white":
             opponent_username = game.black_username
             opponent_rating = game.black_rating
@@ -173,29 +663,34 @@ class GameService:
             opponent_username = game.white_username
             opponent_rating = game.white_rating
         
-        return GameResponse(
-            id=game.id,
-            rated=game.rated,
-            variant=game.variant,
-            speed=game.speed,
-            perf_type=game.perf_type,
-            time_control_initial=game.time_control_initial,
-            time_control_increment=game.time_control_increment,
-            white_username=game.white_username,
-            white_rating=game.white_rating,
-            white_rating_diff=game.white_rating_diff,
-            black_username=game.black_username,
-            black_rating=game.black_rating,
-            black_rating_diff=game.black_rating_diff,
-            user_color=game.user_color,
-            result=game.result,
-            status=game.status,
-            winner=game.winner,
-            created_at=game.created_at,
-            last_move_at=game.last_move_at,
-            opening_eco=game.opening_eco,
-            opening_name=game.opening_name,
-            opponent_username=opponent_username,
-            opponent_rating=opponent_rating,
-            lichess_url=f"https://lichess.org/{game.id}",
-        )
+        return {
+            "id": game.id,
+            "rated": game.rated,
+            "variant": game.variant,
+            "speed": game.speed,
+            "perf_type": game.perf_type,
+            "time_control_initial": game.time_control_initial,
+            "time_control_increment": game.time_control_increment,
+            "white_username": game.white_username,
+            "white_rating": game.white_rating,
+            "white_rating_diff": game.white_rating_diff,
+            "black_username": game.black_username,
+            "black_rating": game.black_rating,
+            "black_rating_diff": game.black_rating_diff,
+            "user_color": game.user_color,
+            "result": game.result,
+            "status": game.status,
+            "winner": game.winner,
+            "created_at": game.created_at,
+            "last_move_at": game.last_move_at,
+            "opening_eco": game.opening_eco,
+            "opening_name": game.opening_name,
+            "opponent_username": opponent_username,
+            "opponent_rating": opponent_rating,
+            "lichess_url": f"https://lichess.org/{game.id}",
+        }
+    
+    @staticmethod
+    def game_to_response(game: Row) -> GameResponse:
+        """Convert Game model to GameResponse schema"""
+        return GameResponse(**GameService.game_to_dict(game))
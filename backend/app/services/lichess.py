@@ -1,9 +1,10 @@
 import httpx
-from typing import Optional, List, AsyncGenerator
+from typing import Optional, AsyncGenerator
 from datetime import datetime
 import json
 
 from app.config import settings
+from app.services.rate_limit import Priority, lichess_rate_limiter
 
 
 class LichessService:
@@ -12,8 +13,83 @@ class LichessService:
     BASE_URL = "https://lichess.org"
     API_URL = "https://lichess.org/api"
     
-    def __init__(self, access_token: Optional[str] = None):
+    # Process-wide pooled client, reused across requests to keep
+    # connections to lichess.org alive
+    _client: Optional[httpx.AsyncClient] = None
+    
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
         self.access_token = access_token
+        self.priority = priority
+    
+    @classmethod
+    def start_client(cls) -> httpx.AsyncClient:
+        """Create the shared HTTP client (call once per process)"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.LICHESS_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LICHESS_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.LICHESS_HTTP_KEEPALIVE_EXPIRY,
+                ),
+                http2=settings.LICHESS_HTTP2,
+                timeout=30.0,
+            )
+        return cls._client
+    
+    @classmethod
+    async def close_client(cls) -> None:
+        """Close the shared HTTP client and its pooled connections"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+    
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use"""
+        if cls._client is None or cls._client.is_closed:
+            return cls.start_client()
+        return cls._client
+    
+    @classmethod
+    async def _send(
+        cls,
+        request: httpx.Request,
+        priority: Priority = Priority.INTERACTIVE,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        Send a request through the shared Lichess rate limiter.
+        On 429 all workers back off for Retry-After before the request is
+        retried; after LICHESS_MAX_RETRIES the 429 response is returned.
+        Interactive requests give up with RateLimitExceeded instead of
+        waiting longer than LICHESS_INTERACTIVE_MAX_WAIT.
+        """
+        max_wait = None
+        if priority == Priority.INTERACTIVE:
+            max_wait = settings.LICHESS_INTERACTIVE_MAX_WAIT
+        
+        attempt = 0
+        while True:
+            await lichess_rate_limiter.acquire(priority, max_wait=max_wait)
+            response = await cls.get_client().send(request, stream=stream)
+            if response.status_code != 429 or attempt >= settings.LICHESS_MAX_RETRIES:
+                return response
+            
+            await response.aclose()
+            attempt += 1
+            await lichess_rate_limiter.penalize(cls._get_retry_after(response, attempt))
+    
+    @staticmethod
+    def _get_retry_after(response: httpx.Response, attempt: int) -> float:
+        """Seconds to back off after a 429, from Retry-After if present"""
+        try:
+            return max(float(response.headers["Retry-After"]), 1.0)
+        except (KeyError, ValueError):
+            return settings.LICHESS_DEFAULT_RETRY_AFTER * attempt
     
     def _get_headers(self) -> dict:
         headers = {"Accept": "application/json"}
@@ -23,48 +99,59 @@ class LichessService:
     
     async def get_account(self) -> Optional[dict]:
         """Get the authenticated user's account info"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.API_URL}/account",
-                headers=self._get_headers(),
-                timeout=30.0
-            )
-            if response.status_code == 200:
-                return response.json()
-            return None
+        request = self.get_client().build_request(
+            "GET",
+            f"{self.API_URL}/account",
+            headers=self._get_headers(),
+            timeout=30.0
+        )
+        response = await self._send(request, self.priority)
+        if response.status_code == 200:
+            return response.json()
+        return None
     
     async def get_user_public(self, username: str) -> Optional[dict]:
-        """Get public info for any user"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.API_URL}/user/{username}",
-                headers={"Accept": "application/json"},
-                timeout=30.0
-            )
-            if response.status_code == 200:
-                return response.json()
+        """
+        Get public info for any user, or None if Lichess has no such user.
+        Raises httpx.HTTPStatusError for any other failed response, so a
+        Lichess outage is not mistaken for a missing user.
+        """
+        request = self.get_client().build_request(
+            "GET",
+            f"{self.API_URL}/user/{username}",
+            headers={"Accept": "application/json"},
+            timeout=30.0
+        )
+        response = await self._send(request, self.priority)
+        if response.status_code == 404:
             return None
+        response.raise_for_status()
+        return response.json()
     
-    async def get_user_games(
+    async def iter_user_games(
         self,
         username: str,
-        max_games: int = 50,
+        max_games: Optional[int] = 50,
         perf_type: Optional[str] = None,
         since: Optional[datetime] = None,
         until: Optional[datetime] = None,
         rated: Optional[bool] = None,
-    ) -> List[dict]:
+        sort: Optional[str] = None,
+    ) -> AsyncGenerator[dict, None]:
         """
-        Get user's games from Lichess API
-        Returns games as NDJSON stream
+        Stream user's games from Lichess API.
+        Yields games one by one as NDJSON lines arrive.
+        sort is "dateDesc" (Lichess default) or "dateAsc". With max_games
+        None the stream is unbounded and the caller stops reading it.
         """
         params = {
-            "max": min(max_games, 300),  # Lichess limit
             "opening": "true",
             "clocks": "true",
             "pgnInJson": "false",
         }
         
+        if max_games is not None:
+            params["max"] = min(max_games, 300)  # Lichess limit
         if perf_type:
             params["perfType"] = perf_type
         if since:
@@ -73,32 +160,38 @@ class LichessService:
             params["until"] = int(until.timestamp() * 1000)
         if rated is not None:
             params["rated"] = str(rated).lower()
+        if sort:
+            params["sort"] = sort
         
-        games = []
-        
-        async with httpx.AsyncClient() as client:
-            async with client.stream(
-                "GET",
-                f"{self.API_URL}/games/user/{username}",
-                params=params,
-                headers={
-                    "Accept": "application/x-ndjson",
-                    **({"Authorization": f"Bearer {self.access_token}"} if self.access_token else {})
-                },
-                timeout=60.0
-            ) as response:
-                if response.status_code != 200:
-                    return []
-                
-                async for line in response.aiter_lines():
-                    if line.strip():
-                        try:
-                            game = json.loads(line)
-                            games.append(game)
-                        except json.JSONDecodeError:
-                            continue
+        request = self.get_client().build_request(
+            "GET",
+            f"{self.API_URL}/games/user/{username}",
+            params=params,
+            headers={
+                "Accept": "application/x-ndjson",
+                **({"Authorization": f"Bearer {self.access_token}"} if self.access_token else {})
+            },
+            timeout=60.0
+        )
+        response = await self._send(request, self.priority, stream=True)
         
-        return games
+        try:
+            if response.status_code == 429:
+                # Still throttled after backing off: fail loudly rather
+                # than report an empty sync
+                response.raise_for_status()
+            if response.status_code != 200:
+                return
+            
+            async for line in response.aiter_lines():
+                if line.strip():
+                    try:
+                        game = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    yield game
+        finally:
+            await response.aclose()
     
     async def get_user_games_count(self, username: str) -> Optional[dict]:
         """Get count of games by type for a user"""
@@ -107,37 +200,40 @@ class LichessService:
             return user_data.get("count")
         return None
     
-    @staticmethod
+    @classmethod
     async def exchange_code_for_token(
+        cls,
         code: str,
         code_verifier: str,
     ) -> Optional[dict]:
         """Exchange authorization code for access token"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{LichessService.BASE_URL}/api/token",
-                data={
-                    "grant_type": "authorization_code",
-                    "code": code,
-                    "code_verifier": code_verifier,
-                    "redirect_uri": settings.LICHESS_REDIRECT_URI,
-                    "client_id": settings.LICHESS_CLIENT_ID,
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=30.0
-            )
-            if response.status_code == 200:
-                return response.json()
-            print(f"Token exchange error: {response.status_code} - {response.text}")
-            return None
+        request = cls.get_client().build_request(
+            "POST",
+            f"{cls.BASE_URL}/api/token",
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "code_verifier": code_verifier,
+                "redirect_uri": settings.LICHESS_REDIRECT_URI,
+                "client_id": settings.LICHESS_CLIENT_ID,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=30.0
+        )
+        response = await cls._send(request)
+        if response.status_code == 200:
+            return response.json()
+        print(f"Token exchange error: {response.status_code} - {response.text}")
+        return None
     
-    @staticmethod
-    async def revoke_token(access_token: str) -> bool:
+    @classmethod
+    async def revoke_token(cls, access_token: str) -> bool:
         """Revoke an access token (logout)"""
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{LichessService.BASE_URL}/api/token",
-                headers={"Authorization": f"Bearer {access_token}"},
-                timeout=30.0
-            )
-            return response.status_code == 204
+        request = cls.get_client().build_request(
+            "DELETE",
+            f"{cls.BASE_URL}/api/token",
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=30.0
+        )
+        response = await cls._send(request)
+        return response.status_code == 204
@@ -0,0 +1,43 @@
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game import game_partition_ddl
+
+
+class PartitionService:
+    """Maintenance of the hash-partitioned games table"""
+    
+    @staticmethod
+    async def ensure_partitions(db: AsyncSession) -> None:
+        """Create any missing games partition"""
+        for statement in game_partition_ddl():
+            await db.execute(text(statement))
+    
+    @staticmethod
+    async def analyze(db: AsyncSession) -> None:
+        """
+        Refresh planner statistics of the games parent table. Autovacuum
+        analyzes each partition but never the partitioned parent.
+        """
+        await db.execute(text("ANALYZE games"))
+    
+    @staticmethod
+    async def get_partition_stats(db: AsyncSession) -> List[dict]:
+        """Estimated rows and size of each games partition, to spot skew"""
+        result = await db.execute(
+            text(
+                "SELECT c.relname AS name, "
+                "       c.reltuples::bigint AS rows, "
+                "       pg_total_relation_size(c.oid) AS bytes "
+                "FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'games'::regclass "
+                "ORDER BY c.relname"
+            )
+        )
+        return [
+            {"name": row.name, "rows": max(row.rows, 0), "bytes": row.bytes}
+            for row in result.all()
+        ]
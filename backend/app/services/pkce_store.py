@@ -0,0 +1,100 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class PKCEStore(ABC):
+    """Storage for PKCE verifiers between /auth/login and /auth/callback"""
+    
+    @abstractmethod
+    async def put(self, state: str, verifier: str) -> None:
+        """Store a verifier under state for PKCE_TTL_SECONDS"""
+    
+    @abstractmethod
+    async def pop(self, state: str) -> Optional[str]:
+        """Atomically get and remove the verifier for state"""
+
+
+class InMemoryPKCEStore(PKCEStore):
+    """
+    Per-process store with TTL expiry, bounded to max_entries (oldest
+    evicted first). Only works when login and callback hit the same process.
+    """
+    
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # state -> (expires_at, verifier), in insertion order
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+    
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            state, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[state]
+    
+    async def put(self, state: str, verifier: str) -> None:
+        self._entries[state] = (time.monotonic() + self.ttl, verifier)
+        self._entries.move_to_end(state)
+        self._evict()
+    
+    async def pop(self, state: str) -> Optional[str]:
+        entry = self._entries.pop(state, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+
+class RedisPKCEStore(PKCEStore):
+    """
+    Store shared by all workers, so the callback may land on any of them.
+    Falls back to a bounded in-memory store while Redis is unavailable.
+    """
+    
+    KEY_PREFIX = "pkce:"
+    
+    def __init__(self, ttl: int, fallback: InMemoryPKCEStore):
+        self.ttl = ttl
+        self.fallback = fallback
+    
+    async def put(self, state: str, verifier: str) -> None:
+        try:
+            await get_redis().set(f"{self.KEY_PREFIX}{state}", verifier, ex=self.ttl)
+        except RedisError as e:
+            logger.warning("PKCE store unavailable, keeping verifier in memory: %s", e)
+            await self.fallback.put(state, verifier)
+    
+    async def pop(self, state: str) -> Optional[str]:
+        try:
+            verifier = await get_redis().getdel(f"{self.KEY_PREFIX}{state}")
+        except RedisError as e:
+            logger.warning("PKCE store unavailable, checking memory: %s", e)
+            verifier = None
+        
+        if verifier is None:
+            # May have been stored during a Redis outage
+            verifier = await self.fallback.pop(state)
+        return verifier
+
+
+def create_pkce_store() -> PKCEStore:
+    """Create the PKCE store selected by PKCE_STORE_BACKEND"""
+    memory_store = InMemoryPKCEStore(
+        ttl=settings.PKCE_TTL_SECONDS,
+        max_entries=settings.PKCE_MEMORY_MAX_ENTRIES,
+    )
+    if settings.PKCE_STORE_BACKEND == "memory":
+        return memory_store
+    return RedisPKCEStore(ttl=settings.PKCE_TTL_SECONDS, fallback=memory_store)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.services.lichess import LichessService
+
+
+logger = logging.getLogger(__name__)
+
+
+class PublicProfileCache:
+    """
+    Redis cache of Lichess public profiles with stale-while-revalidate.
+    
+    Entries younger than PUBLIC_PROFILE_FRESH_TTL are served as is. Older
+    ones are served immediately while a background refresh runs, until
+    they expire after PUBLIC_PROFILE_STALE_TTL. Only a Lichess 404 is
+    cached as a missing user; other upstream errors (httpx.HTTPError) are
+    raised and leave the cached entry as it was. Concurrent misses for
+    the same username share one upstream request: in-process through a
+    shared task, across workers through a short Redis lock.
+    """
+    
+    KEY_PREFIX = "profile:public:"
+    LOCK_PREFIX = "profile:public:lock:"
+    LOCK_TTL_MS = 10_000
+    LOCK_WAIT = 5.0  # seconds to wait for another worker's fetch
+    LOCK_POLL_INTERVAL = 0.1
+    
+    # In-flight fetches in this process, by lowercased username
+    _inflight: dict[str, asyncio.Task] = {}
+    
+    @classmethod
+    async def get(cls, username: str) -> Optional[dict]:
+        """
+        Get a public profile, or None if the user does not exist.
+        Raises httpx.HTTPError if Lichess fails and nothing is cached.
+        """
+        key = username.lower()
+        entry = await cls._read(key)
+        
+        if entry is not None:
+            fresh_ttl = (
+                settings.PUBLIC_PROFILE_FRESH_TTL
+                if entry["data"] is not None
+                else settings.PUBLIC_PROFILE_NEGATIVE_TTL
+            )
+            if time.time() - entry["fetched_at"] >= fresh_ttl:
+                # Serve stale, refresh in the background
+                cls._fetch_coalesced(key)
+            return entry["data"]
+        
+        return await asyncio.shield(cls._fetch_coalesced(key))
+    
+    @classmethod
+    def _fetch_coalesced(cls, key: str) -> asyncio.Task:
+        """Start a fetch for key unless one is already running"""
+        task = cls._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(cls._fetch_and_store(key))
+            cls._inflight[key] = task
+            
+            def _done(t: asyncio.Task) -> None:
+                cls._inflight.pop(key, None)
+                # Retrieve the exception so background refreshes don't warn
+                if not t.cancelled() and t.exception() is not None:
+                    logger.warning("Profile fetch for %s failed: %s", key, t.exception())
+            
+            task.add_done_callback(_done)
+        return task
+    
+    @classmethod
+    async def _fetch_and_store(cls, key: str) -> Optional[dict]:
+        """Fetch from Lichess, letting only one worker at a time do so"""
+        redis = get_redis()
+        lock_key = f"{cls.LOCK_PREFIX}{key}"
+        
+        try:
+            acquired = await redis.set(lock_key, "1", nx=True, px=cls.LOCK_TTL_MS)
+        except RedisError as e:
+            logger.warning("Profile cache unavailable: %s", e)
+            return await LichessService().get_user_public(key)
+        
+        if not acquired:
+            # Another worker is fetching: wait for its result
+            started = time.time()
+            deadline = started + cls.LOCK_WAIT
+            while time.time() < deadline:
+                await asyncio.sleep(cls.LOCK_POLL_INTERVAL)
+                entry = await cls._read(key)
+                if entry is not None and entry["fetched_at"] >= started:
+                    return entry["data"]
+        
+        try:
+            # Raises on upstream errors, so only a real 404 is cached as None
+            data = await LichessService().get_user_public(key)
+            await cls._write(key, data)
+            return data
+        finally:
+            if acquired:
+                try:
+                    await redis.delete(lock_key)
+                except RedisError:
+                    pass
+    
+    @classmethod
+    async def _read(cls, key: str) -> Optional[dict]:
+        try:
+            raw = await get_redis().get(f"{cls.KEY_PREFIX}{key}")
+        except RedisError as e:
+            logger.warning("Profile cache unavailable: %s", e)
+            return None
+        return json.loads(raw) if raw else None
+    
+    @classmethod
+    async def _write(cls, key: str, data: Optional[dict]) -> None:
+        # Missing users are cached too, for a shorter time
+        ttl = (
+            settings.PUBLIC_PROFILE_STALE_TTL
+            if data is not None
+            else settings.PUBLIC_PROFILE_NEGATIVE_TTL
+        )
+        try:
+            await get_redis().set(
+                f"{cls.KEY_PREFIX}{key}",
+                json.dumps({"fetched_at": time.time(), "data": data}),
+                ex=ttl,
+            )
+        except RedisError as e:
+            logger.warning("Profile cache unavailable: %s", e)
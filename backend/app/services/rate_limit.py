@@ -0,0 +1,147 @@
+import asyncio
+import enum
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(str, enum.Enum):
+    INTERACTIVE = "interactive"  # user is waiting on the response
+    BACKGROUND = "background"  # Celery sync
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than allowed"""
+    
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+# Token bucket shared by every process. Returns 0 if a token was taken,
+# otherwise the number of milliseconds to wait before trying again.
+# Background callers must leave `reserve` tokens in the bucket so that
+# interactive requests are served first when the bucket runs low.
+_ACQUIRE_SCRIPT = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) * 1000 + math.floor(tonumber(now_t[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+
+local blocked_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if blocked_until > now then
+    return blocked_until - now
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 + reserve - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+# Block all callers until now + ARGV[1] ms, never shortening a block
+_PENALIZE_SCRIPT = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) * 1000 + math.floor(tonumber(now_t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if until_ms > current then
+    redis.call('SET', KEYS[1], until_ms, 'PX', tonumber(ARGV[1]))
+end
+return until_ms
+"""
+
+
+class RateLimiter:
+    """Redis-backed token bucket shared by API and Celery workers"""
+    
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: int,
+        background_reserve: int = 0,
+    ):
+        self.bucket_key = f"ratelimit:{name}:bucket"
+        self.block_key = f"ratelimit:{name}:blocked_until"
+        self.rate = rate
+        self.capacity = capacity
+        self.background_reserve = background_reserve
+    
+    async def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        """
+        Wait until a request may be sent.
+        Raises RateLimitExceeded if that would take longer than max_wait seconds.
+        If Redis is unavailable the limiter fails open.
+        """
+        reserve = self.background_reserve if priority == Priority.BACKGROUND else 0
+        waited = 0.0
+        
+        while True:
+            try:
+                wait_ms = await get_redis().eval(
+                    _ACQUIRE_SCRIPT,
+                    2,
+                    self.bucket_key,
+                    self.block_key,
+                    self.rate,
+                    self.capacity,
+                    reserve,
+                )
+            except RedisError as e:
+                logger.warning("Rate limiter unavailable, allowing request: %s", e)
+                return
+            
+            if not wait_ms:
+                return
+            
+            wait = int(wait_ms) / 1000
+            if max_wait is not None and waited + wait > max_wait:
+                raise RateLimitExceeded(wait)
+            
+            await asyncio.sleep(wait)
+            waited += wait
+    
+    async def penalize(self, retry_after: float) -> None:
+        """Block every caller for retry_after seconds (after an upstream 429)"""
+        try:
+            await get_redis().eval(
+                _PENALIZE_SCRIPT,
+                1,
+                self.block_key,
+                int(retry_after * 1000),
+            )
+        except RedisError as e:
+            logger.warning("Rate limiter unavailable, backing off locally: %s", e)
+            await asyncio.sleep(retry_after)
+
+
+lichess_rate_limiter = RateLimiter(
+    "lichess",
+    rate=settings.LICHESS_RATE_LIMIT_PER_SECOND,
+    capacity=settings.LICHESS_RATE_LIMIT_BURST,
+    background_reserve=settings.LICHESS_RATE_LIMIT_INTERACTIVE_RESERVE,
+)
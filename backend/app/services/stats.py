@@ -0,0 +1,619 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, delete, func, case, insert, cast, any_, bindparam, Date, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert, array_agg, aggregate_order_by, ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game import Game, GameResult
+from app.models.stats import UserGameStats, UserOpeningStats
+from app.models.user import User
+from app.schemas.game import GameFilters
+from app.services.archive import ArchiveService
+
+
+# Default number of points in a rating history series
+RATING_HISTORY_POINTS = 300
+
+
+# Rollup counter column for each game result
+RESULT_COLUMNS = {
+    GameResult.WIN: "wins",
+    GameResult.LOSS: "losses",
+    GameResult.DRAW: "draws",
+}
+
+
+class StatsService:
+    """Service for game statistics"""
+    
+    @staticmethod
+    def user_rating_expr():
+        """SQL expression for the user's own rating in a game"""
+        return case(
+            (Game.user_color == "white", Game.white_rating),
+            else_=Game.black_rating,
+        )
+    
+    @staticmethod
+    def aggregate_query(user_id: str):
+        """
+        Select a user's games aggregated in one pass per perf type and
+        color, with the same columns as UserGameStats. Further where
+        clauses narrow the games counted.
+        """
+        user_rating = StatsService.user_rating_expr()
+        return (
+            select(
+                Game.user_id,
+                Game.perf_type,
+                Game.user_color,
+                func.count().label("games"),
+                func.count().filter(Game.result == GameResult.WIN).label("wins"),
+                func.count().filter(Game.result == GameResult.LOSS).label("losses"),
+                func.count().filter(Game.result == GameResult.DRAW).label("draws"),
+                func.min(user_rating).label("min_rating"),
+                func.max(user_rating).label("max_rating"),
+            )
+            .where(Game.user_id == user_id)
+            .group_by(Game.user_id, Game.perf_type, Game.user_color)
+        )
+    
+    @staticmethod
+    async def apply_inserted_games(db: AsyncSession, games: Iterable) -> None:
+        """
+        Add newly inserted games to the user_game_stats and
+        user_opening_stats rollups. Must run in the same transaction as
+        the inserts.
+        """
+        games = list(games)
+        await StatsService._apply_game_stats(db, games)
+        await StatsService._apply_opening_stats(db, games)
+    
+    # Game columns read by aggregate_games
+    AGGREGATE_COLUMNS = ("perf_type", "user_color", "result", "white_rating", "black_rating")
+    
+    # Game columns read by apply_inserted_games
+    ROLLUP_COLUMNS = AGGREGATE_COLUMNS + ("created_at", "opening_eco", "opening_name")
+    
+    @staticmethod
+    def _game_stats_deltas(games: Iterable) -> List[dict]:
+        deltas = {}
+        for game in games:
+            key = (game.user_id, game.perf_type, game.user_color)
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = {
+                    "user_id": game.user_id,
+                    "perf_type": game.perf_type,
+                    "user_color": game.user_color,
+                    "games": 0,
+                    "wins": 0,
+                    "losses": 0,
+                    "draws": 0,
+                    "min_rating": None,
+                    "max_rating": None,
+                }
+            
+            delta["games"] += 1
+            delta[RESULT_COLUMNS[GameResult(game.result)]] += 1
+            
+            rating = game.white_rating if game.user_color == "white" else game.black_rating
+            if rating is not None:
+                if delta["min_rating"] is None or rating < delta["min_rating"]:
+                    delta["min_rating"] = rating
+                if delta["max_rating"] is None or rating > delta["max_rating"]:
+                    delta["max_rating"] = rating
+        
+        return list(deltas.values())
+    
+    @staticmethod
+    def aggregate_games(games: Iterable) -> List[UserGameStats]:
+        """
+        Aggregate game rows in memory into unsaved UserGameStats rows,
+        e.g. for archived games that no SQL query can reach
+        """
+        return [UserGameStats(**delta) for delta in StatsService._game_stats_deltas(games)]
+    
+    @staticmethod
+    async def _apply_game_stats(db: AsyncSession, games: List) -> None:
+        deltas = StatsService._game_stats_deltas(games)
+        if not deltas:
+            return
+        
+        stmt = pg_insert(UserGameStats).values(deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                UserGameStats.user_id,
+                UserGameStats.perf_type,
+                UserGameStats.user_color,
+            ],
+            set_={
+                "games": UserGameStats.games + stmt.excluded.games,
+                "wins": UserGameStats.wins + stmt.excluded.wins,
+                "losses": UserGameStats.losses + stmt.excluded.losses,
+                "draws": UserGameStats.draws + stmt.excluded.draws,
+                # LEAST/GREATEST ignore NULLs
+                "min_rating": func.least(UserGameStats.min_rating, stmt.excluded.min_rating),
+                "max_rating": func.greatest(UserGameStats.max_rating, stmt.excluded.max_rating),
+            },
+        )
+        await db.execute(stmt)
+    
+    @staticmethod
+    async def _apply_opening_stats(db: AsyncSession, games: List) -> None:
+        deltas = {}
+        for game in games:
+            row = {
+                "user_id": game.user_id,
+                "perf_type": game.perf_type,
+                "user_color": game.user_color,
+                "month": game.created_at.date().replace(day=1),
+                "opening_eco": game.opening_eco or "",
+                "opening_name": game.opening_name or "",
+            }
+            key = tuple(row.values())
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = {**row, "games": 0, "wins": 0, "losses": 0, "draws": 0}
+            
+            delta["games"] += 1
+            delta[RESULT_COLUMNS[GameResult(game.result)]] += 1
+        
+        if not deltas:
+            return
+        
+        stmt = pg_insert(UserOpeningStats).values(list(deltas.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                UserOpeningStats.user_id,
+                UserOpeningStats.perf_type,
+                UserOpeningStats.user_color,
+                UserOpeningStats.month,
+                UserOpeningStats.opening_eco,
+                UserOpeningStats.opening_name,
+            ],
+            set_={
+                "games": UserOpeningStats.games + stmt.excluded.games,
+                "wins": UserOpeningStats.wins + stmt.excluded.wins,
+                "losses": UserOpeningStats.losses + stmt.excluded.losses,
+                "draws": UserOpeningStats.draws + stmt.excluded.draws,
+            },
+        )
+        await db.execute(stmt)
+    
+    @staticmethod
+    async def get_opening_stats(
+        db: AsyncSession,
+        user_id: str,
+        perf_type: Optional[str] = None,
+        color: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        min_games: int = 1,
+        limit: int = 50,
+    ) -> List[dict]:
+        """
+        Get results by opening and color from the user_opening_stats table.
+        since/until have month granularity: a month is included if the
+        window overlaps it.
+        """
+        games = func.sum(UserOpeningStats.games)
+        query = (
+            select(
+                UserOpeningStats.opening_eco,
+                UserOpeningStats.opening_name,
+                UserOpeningStats.user_color,
+                games.label("games"),
+                func.sum(UserOpeningStats.wins).label("wins"),
+                func.sum(UserOpeningStats.draws).label("draws"),
+                func.sum(UserOpeningStats.losses).label("losses"),
+            )
+            .where(UserOpeningStats.user_id == user_id)
+            .group_by(
+                UserOpeningStats.opening_eco,
+                UserOpeningStats.opening_name,
+                UserOpeningStats.user_color,
+            )
+            .having(games >= min_games)
+            .order_by(games.desc(), UserOpeningStats.opening_eco)
+            .limit(limit)
+        )
+        
+        if perf_type:
+            query = query.where(UserOpeningStats.perf_type == perf_type)
+        if color:
+            query = query.where(UserOpeningStats.user_color == color)
+        if since:
+            query = query.where(UserOpeningStats.month >= since.date().replace(day=1))
+        if until:
+            query = query.where(UserOpeningStats.month <= until.date())
+        
+        result = await db.execute(query)
+        return [
+            {
+                "eco": row.opening_eco or None,
+                "name": row.opening_name or None,
+                "color": row.user_color,
+                "games": row.games,
+                "wins": row.wins,
+                "draws": row.draws,
+                "losses": row.losses,
+                "win_rate": round(row.wins / row.games * 100, 1) if row.games > 0 else 0,
+            }
+            for row in result.all()
+        ]
+    
+    @staticmethod
+    async def get_opponent_stats(
+        db: AsyncSession,
+        user_id: str,
+        perf_type: Optional[str] = None,
+        opponent: Optional[str] = None,
+        min_games: int = 1,
+        limit: int = 20,
+        archived_before: Optional[datetime] = None,
+    ) -> List[dict]:
+        """
+        Get the user's record against each opponent, most played first.
+        rating_change is the user's net rating change in those games and
+        opponent_rating the opponent's rating in the latest one.
+        Reads only ix_games_user_opponent_created.
+        
+        Archived games are folded into per-opponent totals a month at a
+        time. An opponent with no archived games only makes the top
+        `limit` if its hot games alone do, so SQL still ranks and cuts
+        those; the archived opponents' hot games are read separately.
+        """
+        games = func.count()
+        user_rating_diff = case(
+            (Game.user_color == "white", Game.white_rating_diff),
+            else_=Game.black_rating_diff,
+        )
+        query = (
+            select(
+                Game.opponent_username,
+                games.label("games"),
+                games.filter(Game.result == GameResult.WIN).label("wins"),
+                games.filter(Game.result == GameResult.DRAW).label("draws"),
+                games.filter(Game.result == GameResult.LOSS).label("losses"),
+                func.coalesce(func.sum(user_rating_diff), 0).label("rating_change"),
+                func.min(Game.created_at).label("first_played"),
+                func.max(Game.created_at).label("last_played"),
+                array_agg(
+                    aggregate_order_by(Game.opponent_rating, Game.created_at.desc())
+                )[1].label("opponent_rating"),
+            )
+            .where(Game.user_id == user_id, Game.opponent_username.is_not(None))
+            .group_by(Game.opponent_username)
+        )
+        
+        if perf_type:
+            query = query.where(Game.perf_type == perf_type)
+        if opponent:
+            query = query.where(Game.opponent_username == opponent.lower())
+        
+        archived = {}
+        async for month in ArchiveService.stream_games(
+            user_id,
+            archived_before,
+            GameFilters(perf_type=perf_type, opponent=opponent),
+            columns=("opponent_username", "opponent_rating", "result", "white_rating_diff", "black_rating_diff"),
+        ):
+            for game in month:
+                if game.opponent_username is None:
+                    continue
+                stats = archived.get(game.opponent_username)
+                if stats is None:
+                    stats = archived[game.opponent_username] = {
+                        "opponent_username": game.opponent_username,
+                        "games": 0,
+                        "wins": 0,
+                        "draws": 0,
+                        "losses": 0,
+                        "rating_change": 0,
+                        "first_played": game.created_at,
+                        "last_played": game.created_at,
+                        # Archived games come newest first
+                        "opponent_rating": game.opponent_rating,
+                    }
+                stats["games"] += 1
+                stats[RESULT_COLUMNS[GameResult(game.result)]] += 1
+                diff = game.white_rating_diff if game.user_color == "white" else game.black_rating_diff
+                stats["rating_change"] += diff or 0
+                stats["first_played"] = min(stats["first_played"], game.created_at)
+        
+        result = await db.execute(
+            query.having(games >= min_games)
+            .order_by(games.desc(), func.max(Game.created_at).desc())
+            .limit(limit)
+        )
+        opponents = {row.opponent_username: row._asdict() for row in result.all()}
+        
+        missing = [name for name in archived if name not in opponents]
+        if missing:
+            result = await db.execute(
+                query.where(
+                    Game.opponent_username == any_(bindparam("opponents", missing, type_=ARRAY(String)))
+                )
+            )
+            opponents.update((row.opponent_username, row._asdict()) for row in result.all())
+        
+        for name, stats in archived.items():
+            hot = opponents.get(name)
+            if hot is None:
+                opponents[name] = stats
+                continue
+            # Hot games are newer: keep their last_played and opponent_rating
+            for key in ("games", "wins", "draws", "losses", "rating_change"):
+                hot[key] += stats[key]
+            hot["first_played"] = stats["first_played"]
+        
+        ranked = sorted(
+            (stats for stats in opponents.values() if stats["games"] >= min_games),
+            key=lambda stats: (stats["games"], stats["last_played"]),
+            reverse=True,
+        )[:limit]
+        
+        return [
+            {
+                "opponent": stats["opponent_username"],
+                "games": stats["games"],
+                "wins": stats["wins"],
+                "draws": stats["draws"],
+                "losses": stats["losses"],
+                "win_rate": round(stats["wins"] / stats["games"] * 100, 1),
+                "rating_change": stats["rating_change"],
+                "opponent_rating": stats["opponent_rating"],
+                "first_played": stats["first_played"],
+                "last_played": stats["last_played"],
+            }
+            for stats in ranked
+        ]
+    
+    @staticmethod
+    async def get_rating_history(
+        db: AsyncSession,
+        user_id: str,
+        perf_type: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        points: int = RATING_HISTORY_POINTS,
+        archived_before: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Get the user's rating after each rated game of a perf type,
+        downsampled to at most `points` points.
+        Reads only columns in ix_games_user_perf_created_rating, so
+        Postgres can answer it with an index-only scan. Archived games
+        come first in the series; they are read a month at a time and
+        only their (time, rating) points are kept.
+        """
+        rating_after = case(
+            (
+                Game.user_color == "white",
+                Game.white_rating + func.coalesce(Game.white_rating_diff, 0),
+            ),
+            else_=Game.black_rating + func.coalesce(Game.black_rating_diff, 0),
+        )
+        query = (
+            select(Game.created_at, rating_after)
+            .where(
+                Game.user_id == user_id,
+                Game.perf_type == perf_type,
+                Game.rated.is_(True),
+                rating_after.is_not(None),
+            )
+            .order_by(Game.created_at, Game.id)
+        )
+        
+        if since:
+            query = query.where(Game.created_at >= since)
+        if until:
+            query = query.where(Game.created_at <= until)
+        
+        series = []
+        async for month in ArchiveService.stream_games(
+            user_id,
+            archived_before,
+            GameFilters(perf_type=perf_type, rated=True, since=since, until=until),
+            columns=("user_color", "white_rating", "white_rating_diff", "black_rating", "black_rating_diff"),
+            newest_first=False,
+        ):
+            for game in month:
+                if game.user_color == "white":
+                    rating, diff = game.white_rating, game.white_rating_diff
+                else:
+                    rating, diff = game.black_rating, game.black_rating_diff
+                if rating is not None:
+                    series.append((game.created_at, rating + (diff or 0)))
+        
+        result = await db.execute(query)
+        series.extend((row[0], row[1]) for row in result.all())
+        
+        return {
+            "perf_type": perf_type,
+            "games": len(series),
+            "points": [
+                {"t": created_at.isoformat(), "rating": rating}
+                for created_at, rating in StatsService.downsample(series, points)
+            ],
+        }
+    
+    @staticmethod
+    def downsample(
+        series: Sequence[Tuple[datetime, int]],
+        threshold: int,
+    ) -> List[Tuple[datetime, int]]:
+        """
+        Reduce a time-ordered series to `threshold` points with
+        Largest-Triangle-Three-Buckets, which keeps peaks and dips that
+        plain averaging would flatten. First and last points are kept.
+        """
+        n = len(series)
+        if threshold >= n or threshold < 3:
+            return list(series)
+        
+        xs = [p[0].timestamp() for p in series]
+        ys = [p[1] for p in series]
+        
+        sampled = [series[0]]
+        bucket_size = (n - 2) / (threshold - 2)
+        a = 0
+        
+        for i in range(threshold - 2):
+            # Average of the next bucket is the third triangle vertex
+            next_start = int((i + 1) * bucket_size) + 1
+            next_end = min(int((i + 2) * bucket_size) + 1, n)
+            count = next_end - next_start
+            avg_x = sum(xs[next_start:next_end]) / count
+            avg_y = sum(ys[next_start:next_end]) / count
+            
+            # Pick the point in this bucket with the largest triangle
+            start = int(i * bucket_size) + 1
+            end = int((i + 1) * bucket_size) + 1
+            ax, ay = xs[a], ys[a]
+            best, best_area = start, -1.0
+            for j in range(start, end):
+                area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+                if area > best_area:
+                    best, best_area = j, area
+            
+            sampled.append(series[best])
+            a = best
+        
+        sampled.append(series[-1])
+        return sampled
+    
+    @staticmethod
+    async def get_rollup(db: AsyncSession, user_id: str) -> List[UserGameStats]:
+        """Get the user's rollup rows (a primary key range read)"""
+        result = await db.execute(
+            select(UserGameStats).where(UserGameStats.user_id == user_id)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_user_stats(
+        db: AsyncSession,
+        user_id: str,
+        perf_type: Optional[str] = None,
+    ) -> dict:
+        """Get game statistics for a user from the rollup"""
+        rows = await StatsService.get_rollup(db, user_id)
+        if perf_type:
+            rows = [row for row in rows if row.perf_type == perf_type]
+        return StatsService.summarize(rows)
+    
+    @staticmethod
+    def summarize(rows: Iterable) -> dict:
+        """
+        Combine rollup rows, or rows of aggregate_query, into the stats
+        response
+        """
+        results = {result.value: 0 for result in RESULT_COLUMNS}
+        by_type = {}
+        by_color = {}
+        ratings = {}
+        total = 0
+        
+        for row in rows:
+            total += row.games
+            for result, column in RESULT_COLUMNS.items():
+                results[result.value] += getattr(row, column)
+            
+            by_type[row.perf_type] = by_type.get(row.perf_type, 0) + row.games
+            by_color[row.user_color] = by_color.get(row.user_color, 0) + row.games
+            
+            if row.min_rating is not None:
+                perf_ratings = ratings.setdefault(
+                    row.perf_type, {"min": row.min_rating, "max": row.max_rating}
+                )
+                perf_ratings["min"] = min(perf_ratings["min"], row.min_rating)
+                perf_ratings["max"] = max(perf_ratings["max"], row.max_rating)
+        
+        return {
+            "total": total,
+            "results": results,
+            "by_type": by_type,
+            "by_color": by_color,
+            "ratings": ratings,
+            "win_rate": round(results["win"] / total * 100, 1) if total > 0 else 0,
+        }
+    
+    @staticmethod
+    async def rebuild_user_stats(db: AsyncSession, user_id: str) -> bool:
+        """
+        Recompute the user's rollups from raw and archived games.
+        Returns True if the stored user_game_stats had drifted from the
+        recomputed one.
+        """
+        def snapshot(rows):
+            return {
+                (r.perf_type, r.user_color): (
+                    r.games, r.wins, r.losses, r.draws, r.min_rating, r.max_rating
+                )
+                for r in rows
+            }
+        
+        before = snapshot(await StatsService.get_rollup(db, user_id))
+        
+        await db.execute(delete(UserGameStats).where(UserGameStats.user_id == user_id))
+        
+        await db.execute(
+            insert(UserGameStats).from_select(
+                [
+                    "user_id", "perf_type", "user_color",
+                    "games", "wins", "losses", "draws",
+                    "min_rating", "max_rating",
+                ],
+                StatsService.aggregate_query(user_id),
+            )
+        )
+        
+        await db.execute(delete(UserOpeningStats).where(UserOpeningStats.user_id == user_id))
+        
+        month = cast(func.date_trunc("month", Game.created_at), Date)
+        opening_eco = func.coalesce(Game.opening_eco, "")
+        opening_name = func.coalesce(Game.opening_name, "")
+        await db.execute(
+            insert(UserOpeningStats).from_select(
+                [
+                    "user_id", "perf_type", "user_color", "month",
+                    "opening_eco", "opening_name",
+                    "games", "wins", "losses", "draws",
+                ],
+                select(
+                    Game.user_id,
+                    Game.perf_type,
+                    Game.user_color,
+                    month,
+                    opening_eco,
+                    opening_name,
+                    func.count(),
+                    func.count().filter(Game.result == GameResult.WIN),
+                    func.count().filter(Game.result == GameResult.LOSS),
+                    func.count().filter(Game.result == GameResult.DRAW),
+                )
+                .where(Game.user_id == user_id)
+                .group_by(
+                    Game.user_id, Game.perf_type, Game.user_color,
+                    month, opening_eco, opening_name,
+                ),
+            )
+        )
+        
+        # Archived games are no longer in the games table
+        archived_before = await db.scalar(
+            select(User.archived_before).where(User.id == user_id)
+        )
+        async for games in ArchiveService.stream_games(
+            user_id, archived_before, columns=StatsService.ROLLUP_COLUMNS
+        ):
+            await StatsService.apply_inserted_games(db, games)
+        
+        # Reload rather than trust stale identity-map state
+        db.expire_all()
+        after = snapshot(await StatsService.get_rollup(db, user_id))
+        await db.commit()
+        
+        return before != after
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncConflict(Exception):
+    """Raised when a sync cannot run or finish because another one owns the user"""
+
+
+# Delete the lease only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SyncCoordinator:
+    """
+    Single-flight game sync per user, across API and Celery workers.
+    
+    The first caller takes a Redis lease and runs the sync; its result is
+    published for SYNC_RESULT_TTL seconds. Late arrivals with the same
+    parameters, in the same process or not, wait for and return that
+    result instead of starting another sync. Arrivals with other
+    parameters wait for the lease and then run their own sync.
+    
+    Once it holds the lease, the sync takes a fencing token from
+    issue_token, which increments users.sync_fence in Postgres. The sync
+    only commits if no newer token has been issued since, so a holder
+    whose lease expired cannot overwrite a newer sync. The token lives in
+    the database, so losing Redis state cannot make tokens go backwards.
+    """
+    
+    LOCK_PREFIX = "sync:lock:"
+    RESULT_PREFIX = "sync:result:"
+    POLL_INTERVAL = 0.25
+    
+    # In-flight syncs in this process, by user id and parameters
+    _inflight: dict[tuple[str, str], asyncio.Task] = {}
+    
+    @classmethod
+    async def run(
+        cls,
+        user_id: str,
+        sync: Callable[[int], Awaitable[dict]],
+        issue_token: Callable[[], Awaitable[int]],
+        params: Optional[dict] = None,
+    ) -> dict:
+        """
+        Run sync(fencing_token) for user_id. params are the sync's request
+        parameters: a running sync with the same params is joined, one
+        with other params is waited for before this one runs. Raises
+        SyncConflict if the running sync does not finish within
+        SYNC_JOIN_TIMEOUT.
+        """
+        params_key = json.dumps(params or {}, sort_keys=True)
+        inflight_key = (user_id, params_key)
+        
+        task = cls._inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.create_task(cls._run_leased(user_id, params_key, sync, issue_token))
+            cls._inflight[inflight_key] = task
+            task.add_done_callback(lambda _: cls._inflight.pop(inflight_key, None))
+        return await asyncio.shield(task)
+    
+    @classmethod
+    def _result_key(cls, user_id: str, params_key: str) -> str:
+        digest = hashlib.sha1(params_key.encode()).hexdigest()[:16]
+        return f"{cls.RESULT_PREFIX}{user_id}:{digest}"
+    
+    @classmethod
+    async def _run_leased(
+        cls,
+        user_id: str,
+        params_key: str,
+        sync: Callable[[int], Awaitable[dict]],
+        issue_token: Callable[[], Awaitable[int]],
+    ) -> dict:
+        redis = get_redis()
+        lock_key = f"{cls.LOCK_PREFIX}{user_id}"
+        result_key = cls._result_key(user_id, params_key)
+        owner = uuid.uuid4().hex
+        lease = json.dumps([owner, params_key])
+        deadline = time.monotonic() + settings.SYNC_JOIN_TIMEOUT
+        
+        while True:
+            try:
+                acquired = await redis.set(
+                    lock_key, lease, nx=True, px=int(settings.SYNC_LEASE_TTL * 1000)
+                )
+                holder = None if acquired else await redis.get(lock_key)
+                published = None
+                if not acquired and holder is None:
+                    published = await redis.get(result_key)
+            except RedisError as e:
+                # The fencing token still keeps concurrent syncs from both committing
+                logger.warning("Sync lease unavailable, syncing without it: %s", e)
+                return await sync(await issue_token())
+            
+            if acquired:
+                break
+            
+            if holder is None:
+                # The holder finished between our two calls: return what it
+                # published, or take the lease on the next attempt
+                if published is not None:
+                    return json.loads(published)["result"]
+                continue
+            
+            holder_owner, holder_params = json.loads(holder)
+            if holder_params == params_key:
+                return await cls._join(lock_key, result_key, holder, holder_owner)
+            
+            # A sync with other parameters: let it finish, then run ours
+            if time.monotonic() >= deadline:
+                raise SyncConflict("A sync for this user with other parameters is in progress")
+            await asyncio.sleep(cls.POLL_INTERVAL)
+        
+        try:
+            result = await sync(await issue_token())
+            try:
+                await redis.set(
+                    result_key,
+                    json.dumps({"owner": owner, "result": result}),
+                    ex=settings.SYNC_RESULT_TTL,
+                )
+            except RedisError as e:
+                logger.warning("Could not publish sync result: %s", e)
+            return result
+        finally:
+            try:
+                await redis.eval(_RELEASE_SCRIPT, 1, lock_key, lease)
+            except RedisError as e:
+                logger.warning("Could not release sync lease, it will expire: %s", e)
+    
+    @classmethod
+    async def _join(cls, lock_key: str, result_key: str, holder: str, holder_owner: str) -> dict:
+        """Wait for the sync holding the lease and return its result"""
+        redis = get_redis()
+        deadline = time.monotonic() + settings.SYNC_JOIN_TIMEOUT
+        
+        async def _published():
+            raw = await redis.get(result_key)
+            if raw is not None:
+                published = json.loads(raw)
+                if published["owner"] == holder_owner:
+                    return published["result"]
+            return None
+        
+        while time.monotonic() < deadline:
+            try:
+                result = await _published()
+                if result is not None:
+                    return result
+                if await redis.get(lock_key) != holder:
+                    # Released without a result: the holder failed
+                    result = await _published()
+                    if result is not None:
+                        return result
+                    raise SyncConflict("The running sync for this user failed")
+            except RedisError as e:
+                raise SyncConflict(f"Could not follow the running sync: {e}") from e
+            await asyncio.sleep(cls.POLL_INTERVAL)
+        
+        raise SyncConflict("A sync for this user is already in progress")
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
 from app.schemas.user import UserRatings, UserRating, UserProfile
+from app.services.user_cache import UserCache
 
 
 class UserService:
@@ -81,6 +82,7 @@ class UserService:
             user.refresh_token = refresh_token
             user.token_expires_at = token_expires_at
             user.updated_at = datetime.utcnow()
+            UserService.bump_data_version(user)
         else:
             # Create new user
             user = User(
@@ -103,8 +105,18 @@ class UserService:
         
         await db.commit()
         await db.refresh(user)
+        await UserCache.invalidate(user.id)
         return user
     
+    @staticmethod
+    def bump_data_version(user: User) -> None:
+        """
+        Mark the user's data as changed (invalidates ETags).
+        Incremented in SQL so concurrent writers never reuse a version;
+        refresh the attribute after commit before reading it.
+        """
+        user.data_version = User.data_version + 1
+    
     @staticmethod
     async def update_user_tokens(
         db: AsyncSession,
@@ -121,6 +133,7 @@ class UserService:
         
         await db.commit()
         await db.refresh(user)
+        await UserCache.invalidate(user.id)
         return user
     
     @staticmethod
@@ -133,6 +146,7 @@ class UserService:
         
         await db.commit()
         await db.refresh(user)
+        await UserCache.invalidate(user.id)
         return user
     
     @staticmethod
@@ -0,0 +1,138 @@
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+from app.redis_client import get_redis
+from app.schemas.auth import TokenData
+
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Bounded in-process cache of verified JWTs and user rows for
+    authentication. Entries live for AUTH_CACHE_TTL seconds at most.
+    Writes to a user call invalidate(), which evicts it here and, over
+    Redis pub/sub, in every other API worker.
+    """
+    
+    CHANNEL = "users:invalidate"
+    
+    # token -> (expires_at, TokenData)
+    _tokens: "OrderedDict[str, tuple[float, TokenData]]" = OrderedDict()
+    # user_id -> (expires_at, column values)
+    _users: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+    
+    _listener: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _get(store: OrderedDict, key: str):
+        entry = store.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            store.pop(key, None)
+            return None
+        store.move_to_end(key)
+        return value
+    
+    @staticmethod
+    def _put(store: OrderedDict, key: str, value, ttl: float) -> None:
+        store[key] = (time.monotonic() + ttl, value)
+        store.move_to_end(key)
+        while len(store) > settings.AUTH_CACHE_MAX_ENTRIES:
+            store.popitem(last=False)
+    
+    @classmethod
+    def get_token(cls, token: str) -> Optional[TokenData]:
+        """Get cached data for an already verified token"""
+        return cls._get(cls._tokens, token)
+    
+    @classmethod
+    def put_token(cls, token: str, token_data: TokenData) -> None:
+        """Cache a verified token, never past its own expiry"""
+        ttl = settings.AUTH_CACHE_TTL
+        if token_data.exp is not None:
+            ttl = min(ttl, token_data.exp - time.time())
+        if ttl > 0:
+            cls._put(cls._tokens, token, token_data, ttl)
+    
+    @classmethod
+    async def get_user(cls, db: AsyncSession, user_id: str) -> Optional[User]:
+        """
+        Get a cached user attached to db without querying, or None on a miss.
+        The instance behaves as if loaded by db, so it can be updated
+        and committed as usual.
+        """
+        values = cls._get(cls._users, user_id)
+        if values is None:
+            return None
+        
+        user = User(**copy.deepcopy(values))
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+    
+    @classmethod
+    def put_user(cls, user: User) -> None:
+        """Cache a snapshot of a user's columns"""
+        values = {
+            column.key: copy.deepcopy(getattr(user, column.key))
+            for column in User.__table__.columns
+        }
+        cls._put(cls._users, user.id, values, settings.AUTH_CACHE_TTL)
+    
+    @classmethod
+    def evict(cls, user_id: str) -> None:
+        """Drop a user from this process's cache"""
+        cls._users.pop(user_id, None)
+    
+    @classmethod
+    async def invalidate(cls, user_id: str) -> None:
+        """Drop a user from the cache in every worker"""
+        cls.evict(user_id)
+        try:
+            await get_redis().publish(cls.CHANNEL, user_id)
+        except RedisError as e:
+            logger.warning("Could not publish user cache invalidation: %s", e)
+    
+    @classmethod
+    def start_listener(cls) -> None:
+        """Start applying invalidations published by other workers"""
+        if cls._listener is None:
+            cls._listener = asyncio.create_task(cls._listen())
+    
+    @classmethod
+    async def stop_listener(cls) -> None:
+        if cls._listener is not None:
+            cls._listener.cancel()
+            try:
+                await cls._listener
+            except asyncio.CancelledError:
+                pass
+            cls._listener = None
+    
+    @classmethod
+    async def _listen(cls) -> None:
+        while True:
+            try:
+                async with get_redis().pubsub() as pubsub:
+                    await pubsub.subscribe(cls.CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            cls.evict(message["data"])
+            except RedisError as e:
+                logger.warning("User cache invalidation listener lost Redis: %s", e)
+                # Invalidations may have been missed while disconnected
+                cls._users.clear()
+                await asyncio.sleep(1.0)
@@ -1,3 +1,11 @@
 from app.tasks.sync_games import sync_user_games
+from app.tasks.rebuild_stats import rebuild_game_stats
+from app.tasks.archive_games import archive_cold_games
+from app.tasks.maintain_partitions import maintain_game_partitions
 
-__all__ = ["sync_user_games"]
+__all__ = [
+    "sync_user_games",
+    "rebuild_game_stats",
+    "archive_cold_games",
+    "maintain_game_partitions",
+]
@@ -0,0 +1,45 @@
+from sqlalchemy import select
+
+from app.celery_app import celery_app
+from app.models.user import User
+from app.services.archive import ArchiveService, ArchiveError
+from app.tasks import runtime
+
+
+async def _archive_user_games_async(user_id: str):
+    """Async implementation of archiving one user's cold games"""
+    SessionLocal = runtime.get_session_factory()
+    
+    async with SessionLocal() as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            return {"error": "User not found"}
+        
+        try:
+            archived = await ArchiveService.archive_user_games(db, user)
+        except ArchiveError as e:
+            return {"error": str(e)}
+    
+    return {"user_id": user_id, "archived": archived}
+
+
+@celery_app.task(name="archive_cold_games")
+def archive_cold_games(user_id: str = None):
+    """
+    Celery task to move games older than ARCHIVE_AFTER_DAYS (rounded down
+    to whole months) out of the games table into the Parquet archive.
+    Without a user_id, one sub-task is dispatched per user.
+    
+    Example: celery -A app.celery_app call archive_cold_games --args='["someuser"]'
+    """
+    if user_id is not None:
+        return runtime.run(_archive_user_games_async(user_id))
+    
+    # Users already archived up to this month have nothing to do
+    cutoff = ArchiveService.archive_cutoff()
+    dispatched = runtime.fan_out(
+        archive_cold_games,
+        select(User.id).where((User.archived_before.is_(None)) | (User.archived_before < cutoff)),
+    )
+    return {"dispatched": dispatched}
@@ -0,0 +1,34 @@
+from app.celery_app import celery_app
+from app.services.partitions import PartitionService
+from app.tasks import runtime
+
+
+async def _maintain_game_partitions_async():
+    """Async implementation of games partition maintenance"""
+    SessionLocal = runtime.get_session_factory()
+    
+    async with SessionLocal() as db:
+        await PartitionService.ensure_partitions(db)
+        await PartitionService.analyze(db)
+        await db.commit()
+        
+        partitions = await PartitionService.get_partition_stats(db)
+    
+    rows = [p["rows"] for p in partitions]
+    return {
+        "partitions": partitions,
+        # Largest partition relative to the mean; ~1.0 when users spread evenly
+        "skew": round(max(rows) * len(rows) / sum(rows), 2) if sum(rows) > 0 else None,
+    }
+
+
+@celery_app.task(name="maintain_game_partitions")
+def maintain_game_partitions():
+    """
+    Celery task to keep the partitioned games table healthy: creates any
+    missing partition, analyzes the parent table and reports partition
+    sizes.
+    
+    Example: celery -A app.celery_app call maintain_game_partitions
+    """
+    return runtime.run(_maintain_game_partitions_async())
@@ -0,0 +1,31 @@
+from sqlalchemy import select
+
+from app.celery_app import celery_app
+from app.models.user import User
+from app.services.stats import StatsService
+from app.tasks import runtime
+
+
+async def _rebuild_user_stats_async(user_id: str):
+    """Async implementation of the stats rebuild"""
+    SessionLocal = runtime.get_session_factory()
+    
+    async with SessionLocal() as db:
+        drifted = await StatsService.rebuild_user_stats(db, user_id)
+    
+    return {"user_id": user_id, "drifted": drifted}
+
+
+@celery_app.task(name="rebuild_game_stats")
+def rebuild_game_stats(user_id: str = None):
+    """
+    Celery task to recompute the user_game_stats rollup from raw games.
+    Reports whether the stored rollup had drifted. Without a user_id,
+    one sub-task is dispatched per user.
+    
+    Example: celery -A app.celery_app call rebuild_game_stats --args='["someuser"]'
+    """
+    if user_id is not None:
+        return runtime.run(_rebuild_user_stats_async(user_id))
+    
+    return {"dispatched": runtime.fan_out(rebuild_game_stats, select(User.id))}
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+from celery import Task, group
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.config import settings
+from app.redis_client import close_redis
+from app.services.lichess import LichessService
+
+
+T = TypeVar("T")
+
+# Users fetched per cursor round trip and dispatched per Celery group
+FANOUT_BATCH_SIZE = 500
+
+# Per-process async runtime shared by all Celery tasks: one event loop and
+# one database engine (with its connection pool), created when the worker
+# process starts and disposed when it exits.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def init_worker_runtime() -> None:
+    """Create the event loop, DB engine and Lichess client for this process"""
+    global _loop, _engine, _session_factory
+    
+    if _loop is not None:
+        return
+    
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    
+    _engine = create_async_engine(
+        settings.DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=settings.CELERY_DB_POOL_SIZE,
+        max_overflow=settings.CELERY_DB_MAX_OVERFLOW,
+    )
+    _session_factory = async_sessionmaker(
+        _engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+    
+    LichessService.start_client()
+
+
+def shutdown_worker_runtime() -> None:
+    """Close pooled connections and the event loop"""
+    global _loop, _engine, _session_factory
+    
+    if _loop is None:
+        return
+    
+    _loop.run_until_complete(LichessService.close_client())
+    _loop.run_until_complete(close_redis())
+    if _engine is not None:
+        _loop.run_until_complete(_engine.dispose())
+    _loop.close()
+    
+    _loop = None
+    _engine = None
+    _session_factory = None
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Get the session factory bound to this worker's engine"""
+    init_worker_runtime()
+    return _session_factory
+
+
+def run(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion on this worker's event loop"""
+    # Pools without worker_process_init (e.g. solo) initialize lazily
+    init_worker_runtime()
+    return _loop.run_until_complete(coro)
+
+
+async def _fan_out(task: Task, user_id_query: Select, args: tuple) -> int:
+    dispatched = 0
+    batch = []
+    
+    async with get_session_factory()() as db:
+        user_ids = await db.stream_scalars(
+            user_id_query.execution_options(yield_per=FANOUT_BATCH_SIZE)
+        )
+        
+        async for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= FANOUT_BATCH_SIZE:
+                group(task.s(uid, *args) for uid in batch).apply_async()
+                dispatched += len(batch)
+                batch = []
+    
+    if batch:
+        group(task.s(uid, *args) for uid in batch).apply_async()
+        dispatched += len(batch)
+    
+    return dispatched
+
+
+def fan_out(task: Task, user_id_query: Select, *args) -> int:
+    """
+    Dispatch task(user_id, *args) for every user id user_id_query selects.
+    Ids are streamed through a server-side cursor and sent in Celery
+    groups, so neither memory nor the calling task's time limit grows with
+    the number of users. Returns the number of sub-tasks dispatched.
+    """
+    return run(_fan_out(task, user_id_query, args))
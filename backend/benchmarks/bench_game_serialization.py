@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: serializing a page of games for /games/me.
+
+Compares the Pydantic path (GameResponse per row, response_model
+validation, jsonable_encoder + json.dumps as FastAPI does) with the
+orjson fast path used by the route.
+
+Run from backend/:  python -m benchmarks.bench_game_serialization
+"""
+import json
+import timeit
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.models.game import GameResult
+from app.schemas.game import GameListResponse
+from app.services.game import GameService
+
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+
+def make_games(n: int) -> list:
+    """Fake rows with the attributes of a Game"""
+    start = datetime(2024, 1, 1, 12, 0, 0, 123000)
+    return [
+        SimpleNamespace(
+            id=f"game{i:04d}",
+            rated=True,
+            variant="standard",
+            speed="blitz",
+            perf_type="blitz",
+            time_control_initial=180,
+            time_control_increment=2,
+            white_username="someone",
+            white_rating=1500 + i,
+            white_rating_diff=6,
+            black_username="opponent",
+            black_rating=1480 + i,
+            black_rating_diff=-6,
+            user_color="white" if i % 2 else "black",
+            result=GameResult.WIN,
+            status="mate",
+            winner="white",
+            created_at=start - timedelta(minutes=i),
+            last_move_at=start - timedelta(minutes=i) + timedelta(seconds=300),
+            opening_eco="B01",
+            opening_name="Scandinavian Defense",
+        )
+        for i in range(n)
+    ]
+
+
+def pydantic_path(games: list) -> bytes:
+    model = GameListResponse(
+        games=[GameService.game_to_response(g) for g in games],
+        total=len(games),
+        page=1,
+        page_size=PAGE_SIZE,
+        has_more=False,
+    )
+    # FastAPI re-validates against response_model before encoding
+    model = GameListResponse.model_validate(model.model_dump())
+    return json.dumps(jsonable_encoder(model)).encode()
+
+
+def orjson_path(games: list) -> bytes:
+    return orjson.dumps({
+        "games": [GameService.game_to_dict(g) for g in games],
+        "total": len(games),
+        "page": 1,
+        "page_size": PAGE_SIZE,
+        "has_more": False,
+        "next_cursor": None,
+    })
+
+
+def main() -> None:
+    games = make_games(PAGE_SIZE)
+    
+    # Both paths must produce the same document
+    assert json.loads(pydantic_path(games)) == json.loads(orjson_path(games))
+    
+    results = {}
+    for name, fn in [("pydantic", pydantic_path), ("orjson", orjson_path)]:
+        seconds = min(timeit.repeat(lambda: fn(games), number=ROUNDS, repeat=5))
+        results[name] = seconds / ROUNDS * 1000
+        print(f"{name:>8}: {results[name]:.3f} ms per {PAGE_SIZE}-game page")
+    
+    print(f" speedup: {results['pydantic'] / results['orjson']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Fixtures for tests that run against Postgres.
+
+They need TEST_DATABASE_URL to point at a disposable database: its tables
+are dropped and recreated. Tests using them are skipped without it.
+"""
+import json
+import os
+import re
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.database import Base
+
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Statements that read or write the games table
+GAMES_STATEMENT = re.compile(r"\b(?:FROM|INTO|JOIN|UPDATE) games\b")
+
+# Synthetic data set: enough games per partition that the planner
+# prefers the indexes over scanning a partition
+SEED_USERS = 100
+SEED_GAMES_PER_USER = 2000
+
+SEED_USERS_SQL = """
+INSERT INTO users (id, lichess_id, username, ratings, profile, games_sync_watermarks)
+SELECT 'user' || u, 'user' || u, 'user' || u, '{}', '{}', '{}'
+FROM generate_series(1, :users) u
+"""
+
+SEED_GAMES_SQL = """
+INSERT INTO games (
+    id, user_id, rated, variant, speed, perf_type,
+    time_control_initial, time_control_increment,
+    white_username, white_rating, white_rating_diff,
+    black_username, black_rating, black_rating_diff,
+    opponent_username, opponent_rating,
+    user_color, result, status, winner, created_at,
+    opening_eco, opening_name
+)
+SELECT
+    'u' || u || 'g' || g, 'user' || u, g % 5 <> 0, 'standard',
+    perf, perf,
+    180, 2,
+    'user' || u, 1500 + g % 300, g % 11 - 5,
+    'opp' || g % 5, 1500 + g % 200, 5 - g % 11,
+    'opp' || g % 5, 1500 + g % 200,
+    'white', result::gameresult, 'mate',
+    CASE result WHEN 'WIN' THEN 'white' WHEN 'LOSS' THEN 'black' END,
+    timestamp '2024-01-01' + g * interval '10 minutes',
+    'B' || lpad((g % 100)::text, 2, '0'), 'Opening ' || g % 100
+FROM generate_series(1, :users) u,
+     generate_series(1, :games) g,
+     LATERAL (SELECT
+         (ARRAY['bullet', 'blitz', 'rapid', 'classical'])[g % 4 + 1] AS perf,
+         (ARRAY['WIN', 'LOSS', 'DRAW'])[g % 3 + 1] AS result
+     ) v
+"""
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(SEED_USERS_SQL), {"users": SEED_USERS}
+        )
+        await conn.execute(
+            text(SEED_GAMES_SQL), {"users": SEED_USERS, "games": SEED_GAMES_PER_USER}
+        )
+        await conn.execute(text("ANALYZE"))
+    
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db(engine):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def games_queries(engine):
+    """(statement, parameters) of every games query run during the test"""
+    captured = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if GAMES_STATEMENT.search(statement) and not statement.startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def explain(engine):
+    """Async function returning the root node of a statement's EXPLAIN plan"""
+    
+    async def _explain(statement: str, parameters) -> dict:
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+    
+    return _explain
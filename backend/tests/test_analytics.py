@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.game import GameResult
+from app.services.analytics import AnalyticsService, GameColumns
+
+
+@pytest.mark.parametrize(
+    "initial, increment, label",
+    [
+        (15, 0, "¼+0"),
+        (30, 0, "½+0"),
+        (45, 0, "¾+0"),
+        (60, 0, "1+0"),
+        (90, 0, "1.5+0"),
+        (180, 2, "3+2"),
+        (0, 1, "0+1"),
+        (None, None, "unlimited"),
+    ],
+)
+def test_time_control_label(initial, increment, label):
+    assert GameColumns.time_control_label(initial, increment) == label
+
+
+def test_sub_minute_time_controls_are_not_merged():
+    rows = [
+        (datetime(2024, 5, 1, 12), "bullet", GameResult.WIN, "white", True, 1500, 1500, initial, 0)
+        for initial in (15, 30, 45, 60)
+    ]
+    
+    groups = AnalyticsService.breakdown(GameColumns.from_rows(rows), "time_control")
+    
+    assert sorted((g["key"], g["games"]) for g in groups) == [
+        ("1+0", 1), ("¼+0", 1), ("½+0", 1), ("¾+0", 1),
+    ]
@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.game import GameService, InvalidCursor
+
+
+def test_cursor_round_trip():
+    game = SimpleNamespace(created_at=datetime(2024, 5, 1, 12, 30), id="abcd1234")
+    
+    cursor = GameService.encode_cursor(game)
+    
+    assert GameService.decode_cursor(cursor) == (game.created_at, game.id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm90IGpzb24", "WzFd"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        GameService.decode_cursor(cursor)
+
+
+def test_cursor_with_utc_offset():
+    cursor = base64.urlsafe_b64encode(
+        json.dumps(["2024-01-01T00:00:00+00:00", "abcd1234"]).encode()
+    ).decode()
+    
+    with pytest.raises(InvalidCursor):
+        GameService.decode_cursor(cursor)
@@ -0,0 +1,160 @@
+"""
+Every games statement must touch a single partition.
+
+games is hash-partitioned by user_id and every query is per user, so each
+statement should be pruned to that user's partition when it is planned.
+A statement that is not scans all of them.
+"""
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.models.user import User
+from app.schemas.game import GameFilters, GameResult
+from app.services.analytics import AnalyticsService
+from app.services.archive import ArchiveService
+from app.services.game import GameService
+from app.services.stats import StatsService
+
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+PARTITION = re.compile(r"^games_p\d+$")
+
+FILTERS = GameFilters(
+    perf_type="blitz",
+    result=GameResult.WIN,
+    rated=True,
+    since=datetime(2024, 1, 10),
+)
+
+
+def partitions(plan: dict) -> set:
+    """Names of the games partitions an EXPLAIN plan reads"""
+    names = set()
+    if PARTITION.match(plan.get("Relation Name", "")):
+        names.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        names |= partitions(child)
+    return names
+
+
+async def assert_one_partition(explain, games_queries):
+    assert games_queries, "no games query was run"
+    for statement, parameters in games_queries:
+        scanned = partitions(await explain(statement, parameters))
+        assert len(scanned) == 1, f"{sorted(scanned)}\n{' '.join(statement.split())}"
+
+
+async def get_user(db, user_id: str) -> User:
+    return (await db.execute(select(User).where(User.id == user_id))).scalar_one()
+
+
+async def list_pages(db, user):
+    _, _, cursor = await GameService.get_user_games(db, user.id, page_size=5)
+    await GameService.get_user_games(db, user.id, page=3, filters=FILTERS)
+    await GameService.get_user_games(db, user.id, cursor=cursor)
+
+
+async def count(db, user):
+    await GameService._count_hot_games(db, user.id, FILTERS)
+
+
+async def get_game(db, user):
+    await GameService.get_user_game(db, user.id, "nonexistent")
+
+
+async def filtered_stats(db, user):
+    await GameService.get_user_stats(db, user.id, FILTERS)
+
+
+async def stream(db, user):
+    async for _ in GameService.stream_user_games(db, user.id, FILTERS):
+        break
+
+
+async def rating_history(db, user):
+    await StatsService.get_rating_history(db, user.id, "blitz")
+
+
+async def opponent_stats(db, user):
+    await StatsService.get_opponent_stats(db, user.id)
+    await StatsService.get_opponent_stats(db, user.id, perf_type="blitz", opponent="Opp3")
+
+
+async def analytics(db, user):
+    await AnalyticsService.load(db, user)
+
+
+READS = [list_pages, count, get_game, filtered_stats, stream, rating_history, opponent_stats, analytics]
+
+
+@pytest.mark.parametrize("read", READS, ids=[read.__name__ for read in READS])
+async def test_read_touches_one_partition(db, explain, games_queries, read):
+    await read(db, await get_user(db, "user1"))
+    await assert_one_partition(explain, games_queries)
+
+
+async def test_opening_stats_read_only_the_rollup(db, games_queries):
+    await StatsService.get_opening_stats(db, "user1", perf_type="blitz", since=datetime(2024, 1, 1))
+    assert games_queries == []
+
+
+async def test_insert_routes_to_one_partition(db, explain, games_queries):
+    rows = [
+        {
+            "id": f"new{i}",
+            "user_id": "user5",
+            "rated": True,
+            "variant": "standard",
+            "speed": "blitz",
+            "perf_type": "blitz",
+            "white_username": "user5",
+            "white_rating": 1500,
+            "black_username": f"opp{i}",
+            "black_rating": 1500,
+            "opponent_username": f"opp{i}",
+            "opponent_rating": 1500,
+            "user_color": "white",
+            "result": GameResult.WIN,
+            "status": "mate",
+            "winner": "white",
+            "created_at": datetime(2025, 1, 1, i),
+        }
+        for i in range(10)
+    ]
+    
+    assert await GameService.insert_games(db, rows) == len(rows)
+    
+    # Rows are routed by user_id as they are inserted; the statements
+    # themselves must not read any partition
+    assert games_queries
+    for statement, parameters in games_queries:
+        assert partitions(await explain(statement, parameters)) == set()
+    placed = await db.execute(
+        text("SELECT DISTINCT tableoid::regclass::text FROM games WHERE user_id = 'user5'")
+    )
+    assert len(placed.all()) == 1
+    
+    await db.rollback()
+
+
+async def test_rebuild_stats_touches_one_partition(db, explain, games_queries):
+    await StatsService.rebuild_user_stats(db, "user4")
+    await assert_one_partition(explain, games_queries)
+
+
+async def test_archive_touches_one_partition(db, explain, games_queries, tmp_path, monkeypatch):
+    if not ArchiveService.is_available():
+        pytest.skip("pyarrow is not installed")
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    
+    archived = await ArchiveService.archive_user_games(
+        db, await get_user(db, "user3"), cutoff=datetime(2024, 1, 5)
+    )
+    
+    assert archived > 0
+    await assert_one_partition(explain, games_queries)
@@ -0,0 +1,99 @@
+"""
+Plan regression tests for the games list, count and stats queries.
+
+Each query must read games through an index, in the index's order: a
+Sort node means a new filter or ordering no longer matches the indexes
+of Game and the query reads every matching row to return a page.
+"""
+from datetime import datetime
+from typing import Optional
+
+import pytest
+
+from app.schemas.game import GameFilters, GameResult
+from app.services.game import GameService
+
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+USER_ID = "user1"
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+FILTERS = {
+    "none": None,
+    "perf_type": GameFilters(perf_type="blitz"),
+    "result": GameFilters(result=GameResult.WIN),
+    "rated": GameFilters(rated=True),
+    "since": GameFilters(since=datetime(2024, 1, 10)),
+    "opponent": GameFilters(opponent="Opp3"),
+    "combined": GameFilters(
+        perf_type="blitz", result=GameResult.WIN, rated=True, since=datetime(2024, 1, 10)
+    ),
+}
+
+# Only these filters reach the games table; the others are answered
+# from the user_game_stats rollup
+STATS_FILTERS = {
+    name: FILTERS[name] for name in ("rated", "since", "opponent", "combined")
+}
+
+
+def walk(node: dict, parent: Optional[dict] = None):
+    """(parent, node) for every node of an EXPLAIN plan"""
+    yield parent, node
+    for child in node.get("Plans", []):
+        yield from walk(child, node)
+
+
+async def assert_index_plans(explain, games_queries, grouping_sort: bool = False):
+    """
+    Assert every captured query reads games through an index and never
+    sorts. With grouping_sort, a Sort feeding a sorted aggregate is
+    allowed: for a few hundred matching rows the planner may group them
+    by sorting rather than hashing, which does not depend on the table.
+    """
+    assert games_queries, "no games query was run"
+    for statement, parameters in games_queries:
+        nodes = list(walk(await explain(statement, parameters)))
+        node_types = [node["Node Type"] for _, node in nodes]
+        sql = " ".join(statement.split())
+        
+        assert INDEX_SCANS & set(node_types), f"no index scan: {node_types}\n{sql}"
+        assert "Seq Scan" not in node_types, f"sequential scan: {node_types}\n{sql}"
+        for parent, node in nodes:
+            if node["Node Type"] != "Sort":
+                continue
+            assert grouping_sort and parent is not None and parent.get("Strategy") == "Sorted", (
+                f"sort: {node_types}\n{sql}"
+            )
+
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+async def test_list_page(db, explain, games_queries, filters):
+    await GameService.get_user_games(db, USER_ID, page=2, filters=filters, include_total=False)
+    await assert_index_plans(explain, games_queries)
+
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+async def test_list_page_after_cursor(db, explain, games_queries, filters):
+    _, _, cursor = await GameService.get_user_games(
+        db, USER_ID, filters=filters, include_total=False
+    )
+    assert cursor is not None
+    games_queries.clear()
+    
+    await GameService.get_user_games(db, USER_ID, filters=filters, cursor=cursor, include_total=False)
+    await assert_index_plans(explain, games_queries)
+
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+async def test_count(db, explain, games_queries, filters):
+    await GameService._count_hot_games(db, USER_ID, filters)
+    await assert_index_plans(explain, games_queries)
+
+
+@pytest.mark.parametrize("filters", STATS_FILTERS.values(), ids=STATS_FILTERS.keys())
+async def test_filtered_stats(db, explain, games_queries, filters):
+    await GameService.get_user_stats(db, USER_ID, filters)
+    await assert_index_plans(explain, games_queries, grouping_sort=True)
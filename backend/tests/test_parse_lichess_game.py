@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.game import GameResult
+from app.services.game import GameService
+
+
+USER = SimpleNamespace(id="alice", username="Alice")
+
+
+def lichess_game(white: dict, black: dict) -> dict:
+    return {
+        "id": "abcd1234",
+        "rated": False,
+        "speed": "blitz",
+        "perf": "blitz",
+        "createdAt": 1714564800000,
+        "status": "mate",
+        "winner": "white",
+        "players": {"white": white, "black": black},
+    }
+
+
+def test_opponent_is_lowercased_account_id():
+    row = GameService.parse_lichess_game(
+        lichess_game(
+            {"user": {"name": "Alice", "id": "alice"}, "rating": 1500},
+            {"user": {"name": "Bob", "id": "bob"}, "rating": 1600},
+        ),
+        USER,
+    )
+    
+    assert row["user_color"] == "white"
+    assert row["result"] == GameResult.WIN
+    assert (row["opponent_username"], row["opponent_rating"]) == ("bob", 1600)
+
+
+@pytest.mark.parametrize(
+    "opponent",
+    [{"aiLevel": 3}, {}],
+    ids=["ai", "anonymous"],
+)
+def test_opponent_without_account_is_null(opponent):
+    row = GameService.parse_lichess_game(
+        lichess_game(opponent, {"user": {"name": "Alice", "id": "alice"}, "rating": 1500}),
+        USER,
+    )
+    
+    assert row["user_color"] == "black"
+    assert row["white_username"] == "Anonymous"
+    assert row["opponent_username"] is None
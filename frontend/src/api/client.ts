@@ -120,6 +120,9 @@ class ApiClient {
     if (filters?.rated !== undefined) {
       params.append('rated', filters.rated.toString());
     }
+    if (filters?.opponent) {
+      params.append('opponent', filters.opponent);
+    }
 
     const response = await this.client.get<GameListResponse>(`/games/me?${params.toString()}`);
     return response.data;
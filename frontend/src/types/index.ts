@@ -75,12 +75,14 @@ export interface GameListResponse {
   page: number;
   page_size: number;
   has_more: boolean;
+  next_cursor?: string | null;
 }
 
 export interface GameFilters {
   perf_type?: string;
   result?: GameResult;
   rated?: boolean;
+  opponent?: string;
 }
 
 export interface GameStats {